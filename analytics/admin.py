@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import Dataset
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from .models import Dataset, RequestProfile
+from .profiling import top_frames
 
 @admin.register(Dataset)
 class DatasetAdmin(admin.ModelAdmin):
@@ -7,3 +13,48 @@ class DatasetAdmin(admin.ModelAdmin):
     list_filter = ('user', 'created_at')
     search_fields = ('name', 'user__username')
     ordering = ('-created_at',)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('endpoint', 'dataset', 'row_count', 'column_count', 'duration_ms', 'sample_count', 'user', 'created_at')
+    list_filter = ('endpoint', 'created_at')
+    search_fields = ('endpoint', 'path', 'dataset__name', 'user__username')
+    ordering = ('-created_at',)
+    exclude = ('stacks',)
+    readonly_fields = (
+        'user', 'endpoint', 'path', 'dataset', 'row_count', 'column_count', 'status_code',
+        'duration_ms', 'sample_interval_ms', 'sample_count', 'created_at', 'download', 'hottest_frames',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        urls = [
+            path(
+                '<int:profile_id>/collapsed/',
+                self.admin_site.admin_view(self.download_collapsed),
+                name='analytics_requestprofile_collapsed',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def download_collapsed(self, request, profile_id):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profile = get_object_or_404(RequestProfile, id=profile_id)
+        response = HttpResponse(profile.stacks, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.id}-{profile.endpoint}.folded"'
+        return response
+
+    @admin.display(description='Collapsed stacks')
+    def download(self, obj):
+        url = reverse('admin:analytics_requestprofile_collapsed', args=[obj.id])
+        # The .folded file opens in speedscope or renders with flamegraph.pl
+        return format_html('<a href="{}">profile-{}.folded</a>', url, obj.id)
+
+    @admin.display(description='Hottest frames (samples)')
+    def hottest_frames(self, obj):
+        rows = format_html_join('\n', '{:>6}  {}', top_frames(obj.stacks))
+        return format_html('<pre>{}</pre>', rows)
@@ -0,0 +1,147 @@
+import collections
+import functools
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
+
+from .models import Dataset
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted (queue full or wait timed out)."""
+
+
+class AdmissionController:
+    """Per-process gate for memory-heavy analytics work.
+
+    Work is admitted while both the concurrency limit and the memory budget
+    have room; otherwise it waits in a bounded FIFO queue for up to
+    ``timeout`` seconds. Once anyone is waiting, newcomers queue behind them
+    even if they would fit, so large requests are not starved by a stream of
+    small ones. A request larger than the whole budget is still admitted once
+    nothing else is running, so it degrades to running alone instead of
+    never running.
+    """
+
+    def __init__(self, memory_budget, max_concurrent, max_queue, timeout):
+        self.memory_budget = memory_budget
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._condition = threading.Condition()
+        self._waiters = collections.deque()
+        self.active = 0
+        self.reserved_bytes = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self.timed_out_total = 0
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def _has_room(self, cost):
+        if self.active == 0:
+            return True
+        return self.active < self.max_concurrent and self.reserved_bytes + cost <= self.memory_budget
+
+    def acquire(self, cost):
+        with self._condition:
+            if self._waiters or not self._has_room(cost):
+                if len(self._waiters) >= self.max_queue:
+                    self.rejected_total += 1
+                    raise Overloaded('Admission queue is full')
+                ticket = object()
+                self._waiters.append(ticket)
+                deadline = time.monotonic() + self.timeout
+                try:
+                    while self._waiters[0] is not ticket or not self._has_room(cost):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timed_out_total += 1
+                            raise Overloaded('Timed out waiting for admission')
+                        self._condition.wait(remaining)
+                finally:
+                    self._waiters.remove(ticket)
+                    # The next waiter may now be at the head and fit
+                    self._condition.notify_all()
+            self.active += 1
+            self.reserved_bytes += cost
+            self.admitted_total += 1
+
+    def release(self, cost):
+        with self._condition:
+            self.active -= 1
+            self.reserved_bytes -= cost
+            self._condition.notify_all()
+
+    def snapshot(self):
+        with self._condition:
+            return {
+                'active': self.active,
+                'max_concurrent': self.max_concurrent,
+                'reserved_bytes': self.reserved_bytes,
+                'memory_budget': self.memory_budget,
+                'queued': self.queued,
+                'max_queue': self.max_queue,
+                'admitted_total': self.admitted_total,
+                'rejected_total': self.rejected_total,
+                'timed_out_total': self.timed_out_total,
+            }
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_controller():
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(
+                memory_budget=settings.ANALYTICS_ADMISSION_MEMORY_BUDGET,
+                max_concurrent=settings.ANALYTICS_ADMISSION_MAX_CONCURRENT,
+                max_queue=settings.ANALYTICS_ADMISSION_MAX_QUEUE,
+                timeout=settings.ANALYTICS_ADMISSION_QUEUE_TIMEOUT,
+            )
+        return _controller
+
+def estimate_cost(row_count, column_count, cost_factor=1):
+    return int(row_count * max(column_count, 1) * settings.ANALYTICS_ADMISSION_BYTES_PER_CELL * cost_factor)
+
+def overloaded_response(error):
+    response = JsonResponse({'error': str(error)}, status=503)
+    response['Retry-After'] = str(settings.ANALYTICS_ADMISSION_RETRY_AFTER)
+    return response
+
+def admission_controlled(cost_factor=1):
+    """Admit a dataset view against the per-process memory/concurrency budget.
+
+    The cost is estimated from the dataset's row and column counts;
+    ``cost_factor`` scales it for endpoints that hold several copies of the
+    data (e.g. the PDF report). Overload answers 503 with ``Retry-After``.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, dataset_id, *args, **kwargs):
+            dataset = Dataset.objects.filter(id=dataset_id, user=request.user).values('row_count', 'columns').first()
+            if dataset is None:
+                return view(request, dataset_id, *args, **kwargs)
+
+            columns = dataset['columns']
+            if isinstance(columns, str):
+                columns = json.loads(columns)
+            cost = estimate_cost(dataset['row_count'], len(columns or []), cost_factor)
+            controller = get_controller()
+            try:
+                controller.acquire(cost)
+            except Overloaded as e:
+                return overloaded_response(e)
+            try:
+                return view(request, dataset_id, *args, **kwargs)
+            finally:
+                controller.release(cost)
+        return wrapper
+    return decorator
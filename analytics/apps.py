@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analytics'
+
+    def ready(self):
+        # Connects the signals that remove stale search index files
+        from . import search_index  # noqa: F401
@@ -0,0 +1,216 @@
+import io
+import json
+import zlib
+
+from django.conf import settings
+from django.db import connection
+from .lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+# One JSON element per row, streamed by the database instead of loading the
+# whole ``data`` array; the first column is the row's position in the array
+ROW_QUERIES = {
+    'sqlite': (
+        'SELECT CAST(j.key AS INTEGER), j.value FROM datasets, json_each(datasets.data) AS j '
+        'WHERE datasets.id = %s ORDER BY CAST(j.key AS INTEGER)'
+    ),
+    'postgresql': (
+        'SELECT t.idx - 1, t.elem FROM datasets, jsonb_array_elements(datasets.data) '
+        'WITH ORDINALITY AS t(elem, idx) WHERE datasets.id = %s ORDER BY t.idx'
+    ),
+}
+
+# The rows at the given positions (a JSON array parameter), still read in a
+# single pass over ``data``; one JSON path lookup per row would re-read it each time
+ROW_PAGE_QUERIES = {
+    'sqlite': (
+        'SELECT CAST(j.key AS INTEGER), j.value FROM datasets, json_each(datasets.data) AS j '
+        'WHERE j.key IN (SELECT value FROM json_each(%s)) AND datasets.id = %s'
+    ),
+    'postgresql': (
+        'SELECT t.idx - 1, t.elem FROM datasets, jsonb_array_elements(datasets.data) '
+        'WITH ORDINALITY AS t(elem, idx) '
+        'WHERE t.idx - 1 IN (SELECT value::int FROM jsonb_array_elements_text(%s::jsonb)) AND datasets.id = %s'
+    ),
+}
+
+# The JSON types found in each column, in one pass inside the database, so the
+# Parquet schema is known before the first row group is written. Names follow
+# SQLite's json_each: null, true, false, integer, real, text (plus array/object)
+COLUMN_TYPE_QUERIES = {
+    'sqlite': (
+        'SELECT c.key, group_concat(DISTINCT c.type) FROM datasets, json_each(datasets.data) AS r, '
+        'json_each(r.value) AS c WHERE datasets.id = %s GROUP BY c.key'
+    ),
+    'postgresql': (
+        "SELECT c.key, string_agg(DISTINCT CASE jsonb_typeof(c.value) "
+        "WHEN 'number' THEN CASE WHEN c.value::text ~ '^-?[0-9]+$' THEN 'integer' ELSE 'real' END "
+        "WHEN 'string' THEN 'text' WHEN 'boolean' THEN c.value::text ELSE jsonb_typeof(c.value) END, ',') "
+        'FROM datasets, jsonb_array_elements(datasets.data) AS r(elem), jsonb_each(r.elem) AS c '
+        'WHERE datasets.id = %s GROUP BY c.key'
+    ),
+}
+
+def _json_type(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return 'integer'
+    if isinstance(value, float):
+        return 'real'
+    return 'text' if isinstance(value, str) else 'object'
+
+def column_types(dataset):
+    """Map each column to the set of JSON types its values have."""
+    query = COLUMN_TYPE_QUERIES.get(connection.vendor)
+    if query is None:
+        types = {}
+        for row in dataset.get_data():
+            for col, value in row.items():
+                types.setdefault(col, set()).add(_json_type(value))
+        return types
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, [dataset.id])
+        return {col: set(found.split(',')) for col, found in cursor.fetchall()}
+
+def _decode_row(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+def fetch_rows(dataset, row_ids):
+    """Return the rows at positions ``row_ids``, in the order given."""
+    row_ids = [int(row_id) for row_id in row_ids]
+    if not row_ids:
+        return []
+    query = ROW_PAGE_QUERIES.get(connection.vendor)
+    if query is None:
+        rows = dataset.get_data()
+        return [rows[row_id] for row_id in row_ids]
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, [json.dumps(row_ids), dataset.id])
+        fetched = {idx: _decode_row(value) for idx, value in cursor.fetchall()}
+    return [fetched[row_id] for row_id in row_ids]
+
+def iter_row_batches(dataset, batch_size=None, row_ids=None):
+    """Yield lists of row dicts, ``batch_size`` rows at a time, in stored order.
+
+    Rows come from the database through a chunked cursor, so Python holds
+    only one batch of decoded rows. The database still has to parse the
+    whole ``data`` document before it hands out the first row (SQLite's
+    ``json_each`` and PostgreSQL's detoasting of the ``jsonb`` value), so
+    its memory use and the time to the first batch grow with the dataset
+    size, not with ``batch_size``. ``row_ids`` (sorted positions) restricts
+    the output to those rows.
+    """
+    batch_size = batch_size or settings.ANALYTICS_EXPORT_BATCH_SIZE
+    keep = None
+    if row_ids is not None:
+        keep = set(int(row_id) for row_id in row_ids)
+
+    query = ROW_QUERIES.get(connection.vendor)
+    if query is None:
+        # No JSON table function on this backend: slice the loaded rows instead
+        rows = dataset.get_data()
+        if keep is not None:
+            rows = [row for idx, row in enumerate(rows) if idx in keep]
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+        return
+
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(query, [dataset.id])
+        while True:
+            fetched = cursor.fetchmany(batch_size)
+            if not fetched:
+                break
+            batch = [
+                _decode_row(value)
+                for idx, value in fetched
+                if keep is None or idx in keep
+            ]
+            if batch:
+                yield batch
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def stream_csv(batches, columns):
+    yield pd.DataFrame(columns=columns).to_csv(index=False).encode()
+    for batch in batches:
+        yield pd.DataFrame(batch, columns=columns).to_csv(index=False, header=False).encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    # Collects what the Parquet writer emits so it can be yielded as it arrives
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_schema(columns, types):
+    """Arrow schema for ``columns`` given their JSON types (see ``column_types``).
+
+    Columns holding only integers, only numbers or only booleans (plus
+    nulls) keep that type; anything else, including text next to numbers,
+    is written as strings.
+    """
+    import pyarrow as pa
+
+    fields = []
+    for col in columns:
+        found = types.get(col, set()) - {'null'}
+        if found and found <= {'integer'}:
+            arrow_type = pa.int64()
+        elif found and found <= {'integer', 'real'}:
+            arrow_type = pa.float64()
+        elif found and found <= {'true', 'false'}:
+            arrow_type = pa.bool_()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(col, arrow_type))
+    return pa.schema(fields)
+
+def stream_parquet(batches, schema, compression='snappy'):
+    """Encode batches as one Parquet row group each (requires pyarrow).
+
+    ``schema`` is fixed before the first batch, so every row group has the
+    same types however the values of a batch would be inferred on their own.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    text_columns = [field.name for field in schema if pa.types.is_string(field.type)]
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    for batch in batches:
+        df = pd.DataFrame(batch, columns=schema.names)
+        for col in text_columns:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,131 @@
+import math
+import pickle
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from .lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+JOIN_TYPES = ('inner', 'left', 'right', 'outer')
+JOIN_SUFFIXES = ('_left', '_right')
+
+def _partition_key(series):
+    # A value must land in the same partition whatever dtype its batch was
+    # read with, so numbers are hashed by their float value and nulls alike
+    numbers = pd.to_numeric(series, errors='coerce')
+    text = series.astype(str).where(series.notna(), '')
+    return text.where(numbers.isna(), numbers.astype('float64').astype(str))
+
+def _partition_ids(df, keys, partitions):
+    # Hash the key values (not the column names) so equal keys from both sides
+    # land in the same partition
+    key_frame = pd.DataFrame({idx: _partition_key(df[key]) for idx, key in enumerate(keys)})
+    return pd.util.hash_pandas_object(key_frame, index=False).values % partitions
+
+def _batches(source):
+    # A DataFrame, or a callable returning one or an iterable of DataFrame
+    # batches; callables are only invoked when their side is needed
+    if callable(source):
+        source = source()
+    return [source] if isinstance(source, pd.DataFrame) else source
+
+def _combine(pieces):
+    if len(pieces) == 1:
+        return pieces[0]
+    # Batches may infer different dtypes for the same column (e.g. one with
+    # only nulls); such columns are combined as objects and inferred once
+    mixed = [col for col in pieces[0].columns if len({piece[col].dtype for piece in pieces}) > 1]
+    if mixed:
+        pieces = [piece.astype({col: object for col in mixed}) for piece in pieces]
+    combined = pd.concat(pieces, ignore_index=True)
+    if mixed:
+        combined[mixed] = combined[mixed].infer_objects()
+    return combined
+
+def _spill(source, keys, partitions, directory, side):
+    # Each batch is appended to its partitions' files as it arrives, so only
+    # one batch of the side is in memory; the first batch writes every file
+    # so even empty partitions carry the columns
+    first = True
+    for batch in _batches(source):
+        ids = _partition_ids(batch, keys, partitions)
+        for partition in range(partitions):
+            piece = batch[ids == partition]
+            if first or len(piece):
+                with open(Path(directory) / f'{side}_{partition}.pkl', 'ab') as f:
+                    pickle.dump(piece, f, protocol=pickle.HIGHEST_PROTOCOL)
+        first = False
+    if first:
+        raise ValueError(f'The {side} side of the join has no columns')
+
+def _read_partition(path):
+    pieces = []
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                pieces.append(pickle.load(f))
+            except EOFError:
+                break
+    return _combine(pieces)
+
+def _align_keys(left, right, left_on, right_on):
+    # A partition can hold only null keys on one side, read as objects; give
+    # them the other side's type so the merge accepts them
+    for left_key, right_key in zip(left_on, right_on):
+        for frame, key, other in ((left, left_key, right[right_key]), (right, right_key, left[left_key])):
+            if frame[key].dtype != other.dtype and frame[key].isna().all():
+                frame[key] = frame[key].astype('float64' if pd.api.types.is_numeric_dtype(other) else other.dtype)
+
+def hash_join(left, right, left_on, right_on, how='inner', memory_limit=None, build_bytes=None):
+    """Join two tables on key columns with a vectorized hash join.
+
+    ``left`` and ``right`` are DataFrames, or callables returning a DataFrame
+    or an iterable of DataFrame batches, so the rows are read by the join
+    itself. ``build_bytes`` is the expected in-memory size of the build side
+    (``right``); it is measured when ``right`` is a DataFrame and must be
+    given otherwise. When it fits in ``memory_limit`` bytes this is a single
+    ``pandas.merge``. Otherwise each side is streamed batch by batch into
+    hash partitions on disk, and the partitions are joined one at a time with
+    each result written back to disk, so only one batch or one partition is
+    in memory at once. The returned DataFrame is assembled from those results
+    after the inputs are gone; its row order follows the partitions.
+    """
+    if how not in JOIN_TYPES:
+        raise ValueError(f'Unknown join type: {how}')
+    if len(left_on) != len(right_on) or not left_on:
+        raise ValueError('left_on and right_on must list the same number of key columns')
+    if memory_limit is None:
+        memory_limit = settings.ANALYTICS_JOIN_MEMORY_LIMIT
+    if build_bytes is None:
+        if not isinstance(right, pd.DataFrame):
+            raise ValueError('build_bytes is required unless right is a DataFrame')
+        build_bytes = int(right.memory_usage(deep=True).sum())
+
+    merge_kwargs = {'how': how, 'left_on': left_on, 'right_on': right_on, 'suffixes': JOIN_SUFFIXES}
+    if build_bytes <= memory_limit:
+        right = _combine(list(_batches(right)))
+        return pd.merge(_combine(list(_batches(left))), right, **merge_kwargs)
+
+    # Twice the minimum, to leave headroom for skewed keys
+    partitions = math.ceil(build_bytes / memory_limit) * 2
+    spill_root = Path(settings.ANALYTICS_JOIN_SPILL_DIR)
+    spill_root.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=spill_root) as directory:
+        directory = Path(directory)
+        _spill(right, right_on, partitions, directory, 'right')
+        del right
+        _spill(left, left_on, partitions, directory, 'left')
+        del left
+
+        for partition in range(partitions):
+            left_part = _read_partition(directory / f'left_{partition}.pkl')
+            right_part = _read_partition(directory / f'right_{partition}.pkl')
+            _align_keys(left_part, right_part, left_on, right_on)
+            pd.merge(left_part, right_part, **merge_kwargs).to_pickle(directory / f'joined_{partition}.pkl')
+            del left_part, right_part
+            (directory / f'left_{partition}.pkl').unlink()
+            (directory / f'right_{partition}.pkl').unlink()
+
+        return _combine([pd.read_pickle(directory / f'joined_{partition}.pkl') for partition in range(partitions)])
@@ -0,0 +1,39 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    The import runs under a lock, so threads racing on a cold module all wait
+    for the complete module. (``importlib.util.LazyLoader`` is not
+    thread-safe before Python 3.12 and hands half-executed modules to
+    concurrent first requests.)
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return f'<lazy module {self._name!r}>'
+
+
+def lazy_import(name):
+    """Return ``name`` as a module that is only imported on first attribute access.
+
+    Used for pandas and numpy so that importing the URLconf (and serving light
+    pages such as the dashboard or login) does not pay their import cost.
+    """
+    return LazyModule(name)
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from analytics.uploads import expire_sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete abandoned chunked upload sessions and their temporary files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int, default=settings.CHUNKED_UPLOAD_EXPIRY,
+            help='Seconds since the last received chunk (default: CHUNKED_UPLOAD_EXPIRY)'
+        )
+
+    def handle(self, *args, **options):
+        expired = expire_sessions(options['max_age'])
+        self.stdout.write(f'Deleted {expired} expired upload session(s)')
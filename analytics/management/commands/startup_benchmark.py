@@ -0,0 +1,64 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Each scenario runs in a fresh interpreter so it measures a true cold start
+SETUP = (
+    'import time; start = time.perf_counter()\n'
+    'import django; django.setup()\n'
+)
+SCENARIOS = {
+    'url_import': SETUP + (
+        'import importlib\n'
+        'from django.conf import settings\n'
+        'importlib.import_module(settings.ROOT_URLCONF)\n'
+    ),
+    'first_login_page': SETUP + (
+        'from django.test import Client\n'
+        'Client().get("/accounts/login/")\n'
+    ),
+    'preload': SETUP + (
+        'from analytics.warmup import preload\n'
+        'preload()\n'
+    ),
+}
+REPORT = 'print(time.perf_counter() - start)\n'
+
+
+class Command(BaseCommand):
+    help = 'Measure cold-start time of a fresh worker process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def run_scenario(self, code):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'data_analytics_project.settings'
+        ))
+        env.pop('ANALYTICS_PRELOAD', None)
+        result = subprocess.run(
+            [sys.executable, '-c', code + REPORT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True
+        )
+        return float(result.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        results = {}
+        for name, code in SCENARIOS.items():
+            timings = [self.run_scenario(code) for _ in range(options['repeat'])]
+            results[name] = {
+                'min_ms': round(min(timings) * 1000, 1),
+                'median_ms': round(statistics.median(timings) * 1000, 1),
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        for name, timing in results.items():
+            self.stdout.write(f"{name:<18} min {timing['min_ms']:>8.1f} ms   median {timing['median_ms']:>8.1f} ms")
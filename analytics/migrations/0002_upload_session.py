@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:37
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('total_size', models.BigIntegerField()),
+                ('chunk_size', models.IntegerField()),
+                ('total_chunks', models.IntegerField()),
+                ('received_chunks', models.JSONField(default=dict)),
+                ('parsed_bytes', models.BigIntegerField(default=0)),
+                ('parsed_batches', models.IntegerField(default=0)),
+                ('parsed_columns', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dataset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='analytics.dataset')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'upload_sessions',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
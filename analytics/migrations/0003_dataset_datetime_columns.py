@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='datetime_columns',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
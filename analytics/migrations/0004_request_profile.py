@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_dataset_datetime_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=100)),
+                ('path', models.CharField(max_length=2048)),
+                ('row_count', models.IntegerField(blank=True, null=True)),
+                ('column_count', models.IntegerField(blank=True, null=True)),
+                ('status_code', models.IntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('sample_interval_ms', models.FloatField()),
+                ('sample_count', models.IntegerField()),
+                ('stacks', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dataset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='analytics.dataset')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'request_profiles',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
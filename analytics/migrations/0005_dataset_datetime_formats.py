@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_request_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='datetime_formats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
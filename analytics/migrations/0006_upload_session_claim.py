@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_dataset_datetime_formats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 import json
+import uuid
 
 class Dataset(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -8,6 +9,11 @@ class Dataset(models.Model):
     data = models.JSONField()
     columns = models.JSONField()
     row_count = models.IntegerField()
+    # Columns detected as timestamps at ingest, usable as resample time axes
+    datetime_columns = models.JSONField(default=list, blank=True)
+    # Column -> strftime format inferred from the detection sample, so the
+    # column parses with one explicit format; missing for mixed formats
+    datetime_formats = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -20,3 +26,58 @@ class Dataset(models.Model):
     class Meta:
         db_table = 'datasets'
         ordering = ['-created_at']
+
+
+class UploadSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    total_chunks = models.IntegerField()
+    # Chunk index (as string) -> SHA-256 checksum of the stored chunk
+    received_chunks = models.JSONField(default=dict)
+    # Bytes of the leading contiguous chunks already parsed into row batches
+    parsed_bytes = models.BigIntegerField(default=0)
+    parsed_batches = models.IntegerField(default=0)
+    parsed_columns = models.JSONField(null=True, blank=True)
+    # Set while one request parses or finalizes the session's files outside
+    # the row lock; an expired claim belongs to a request that died
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    dataset = models.ForeignKey(Dataset, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def missing_chunks(self):
+        return [idx for idx in range(self.total_chunks) if str(idx) not in self.received_chunks]
+
+    def contiguous_chunks(self):
+        count = 0
+        while str(count) in self.received_chunks:
+            count += 1
+        return count
+
+    class Meta:
+        db_table = 'upload_sessions'
+        ordering = ['-created_at']
+
+
+class RequestProfile(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    endpoint = models.CharField(max_length=100)
+    path = models.CharField(max_length=2048)
+    dataset = models.ForeignKey(Dataset, null=True, blank=True, on_delete=models.SET_NULL)
+    # Dataset shape at the time of the request; kept if the dataset is deleted
+    row_count = models.IntegerField(null=True, blank=True)
+    column_count = models.IntegerField(null=True, blank=True)
+    status_code = models.IntegerField()
+    duration_ms = models.FloatField()
+    sample_interval_ms = models.FloatField()
+    sample_count = models.IntegerField()
+    # Collapsed stacks, one "frame;frame;frame count" line per distinct stack
+    stacks = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'request_profiles'
+        ordering = ['-created_at']
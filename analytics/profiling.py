@@ -0,0 +1,121 @@
+import functools
+import json
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from .models import Dataset, RequestProfile
+
+PROFILE_HEADER = 'HTTP_X_ANALYTICS_PROFILE'
+PROFILE_PARAM = 'profile'
+
+
+class StackSampler(threading.Thread):
+    """Sample one thread's Python stack at a fixed interval.
+
+    Each sample is recorded as a semicolon-joined stack (root first), so the
+    counts are already in the collapsed format read by flamegraph.pl and
+    speedscope.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+_path_prefixes = None
+
+def frame_label(frame):
+    # "function (module/path.py:line)", with the sys.path entry stripped so
+    # pandas/reportlab frames read as package paths
+    global _path_prefixes
+    if _path_prefixes is None:
+        _path_prefixes = sorted((entry.rstrip('/') + '/' for entry in sys.path if entry), key=len, reverse=True)
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in _path_prefixes:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ',')
+
+def collapse_stacks(stacks):
+    return '\n'.join(f'{stack} {count}' for stack, count in stacks.most_common())
+
+def profile_requested(request):
+    return request.META.get(PROFILE_HEADER) == '1' or request.GET.get(PROFILE_PARAM) == '1'
+
+def profiled(view):
+    """Record a sampled stack profile of a dataset view when a staff user asks.
+
+    Profiling is opt-in per request: ``X-Analytics-Profile: 1`` or
+    ``?profile=1``. Other requests only pay for that check. The stored
+    profile id is returned in the ``X-Analytics-Profile-Id`` header. Apply it
+    inside ``admission_controlled`` so the time spent queueing for admission
+    is not counted as the view's own.
+    """
+    @functools.wraps(view)
+    def wrapper(request, dataset_id, *args, **kwargs):
+        if not (profile_requested(request) and request.user.is_staff):
+            return view(request, dataset_id, *args, **kwargs)
+
+        interval = settings.ANALYTICS_PROFILE_INTERVAL
+        sampler = StackSampler(threading.get_ident(), interval)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            response = view(request, dataset_id, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            sampler.stop()
+
+        dataset = Dataset.objects.filter(id=dataset_id, user=request.user).values('id', 'row_count', 'columns').first()
+        columns = dataset['columns'] if dataset else None
+        if isinstance(columns, str):
+            columns = json.loads(columns)
+        profile = RequestProfile.objects.create(
+            user=request.user,
+            endpoint=view.__name__,
+            path=request.get_full_path()[:2048],
+            dataset_id=dataset['id'] if dataset else None,
+            row_count=dataset['row_count'] if dataset else None,
+            column_count=len(columns) if columns is not None else None,
+            status_code=response.status_code,
+            duration_ms=duration * 1000,
+            sample_interval_ms=interval * 1000,
+            sample_count=sum(sampler.stacks.values()),
+            stacks=collapse_stacks(sampler.stacks),
+        )
+        response['X-Analytics-Profile-Id'] = str(profile.id)
+        return response
+    return wrapper
+
+def top_frames(stacks, limit=20):
+    """Leaf frames by sample count, parsed back from collapsed stacks."""
+    counts = Counter()
+    for line in stacks.splitlines():
+        stack, _, count = line.rpartition(' ')
+        if stack:
+            counts[stack.rsplit(';', 1)[-1]] += int(count)
+    return counts.most_common(limit)
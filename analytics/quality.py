@@ -0,0 +1,148 @@
+from django.core.cache import cache
+from .lazy import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Thresholds used by the data-quality checks
+IQR_MULTIPLIER = 1.5
+ROBUST_Z_THRESHOLD = 3.5
+NEAR_CONSTANT_RATIO = 0.99
+HIGH_CARDINALITY_RATIO = 0.95
+HIGH_CARDINALITY_MIN_ROWS = 20
+QUALITY_CACHE_TIMEOUT = 60 * 60
+
+def _finite(value):
+    # JSON has no NaN/Infinity; report such statistics as missing
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+def _numeric_outliers(numeric_df):
+    # Quartiles and medians for every numeric column in one vectorized call
+    quantiles = numeric_df.quantile([0.25, 0.5, 0.75])
+    q1 = quantiles.loc[0.25]
+    median = quantiles.loc[0.5]
+    q3 = quantiles.loc[0.75]
+    iqr = q3 - q1
+    lower = q1 - IQR_MULTIPLIER * iqr
+    upper = q3 + IQR_MULTIPLIER * iqr
+
+    iqr_counts = (numeric_df.lt(lower) | numeric_df.gt(upper)).sum()
+
+    # Robust z-score based on the median absolute deviation
+    mad = (numeric_df - median).abs().median()
+    robust_z = (numeric_df - median).abs().mul(0.6745).div(mad.replace(0, np.nan))
+    robust_counts = robust_z.gt(ROBUST_Z_THRESHOLD).sum()
+
+    minimum = numeric_df.min()
+    maximum = numeric_df.max()
+    # Whisker ends: the most extreme values still inside the fences
+    whisker_low = numeric_df.where(numeric_df.ge(lower)).min()
+    whisker_high = numeric_df.where(numeric_df.le(upper)).max()
+
+    outliers = {}
+    for col in numeric_df.columns:
+        if pd.isna(median[col]):
+            continue
+        outliers[col] = {
+            'q1': _finite(q1[col]),
+            'median': _finite(median[col]),
+            'q3': _finite(q3[col]),
+            'lower_fence': _finite(lower[col]),
+            'upper_fence': _finite(upper[col]),
+            'whisker_low': _finite(whisker_low[col]),
+            'whisker_high': _finite(whisker_high[col]),
+            'min': _finite(minimum[col]),
+            'max': _finite(maximum[col]),
+            'iqr_outliers': int(iqr_counts[col]),
+            'robust_z_outliers': int(robust_counts[col]),
+        }
+    return outliers
+
+def analyze_data_quality(df):
+    """Run the data-quality checks over a DataFrame.
+
+    Every check works on whole columns (or row hashes) so the cost stays
+    linear in the number of cells without any per-cell Python loop.
+    """
+    total_rows = int(len(df))
+    non_null = df.notna().sum()
+    missing = total_rows - non_null
+
+    # Duplicate rows via one 64-bit hash per row
+    if total_rows and len(df.columns):
+        row_hashes = pd.util.hash_pandas_object(df, index=False)
+        duplicate_rows = int(row_hashes.duplicated().sum())
+    else:
+        duplicate_rows = 0
+
+    numeric_df = df.select_dtypes(include='number')
+    outliers = _numeric_outliers(numeric_df) if len(numeric_df.columns) else {}
+
+    constant_columns = []
+    near_constant_columns = []
+    mixed_type_columns = []
+    high_cardinality_columns = []
+    for col in df.columns:
+        series = df[col]
+        count = int(non_null[col])
+        if count == 0:
+            constant_columns.append(col)
+            continue
+
+        value_counts = series.value_counts(dropna=True)
+        unique = len(value_counts)
+        if unique <= 1:
+            constant_columns.append(col)
+            continue
+        top_ratio = value_counts.iloc[0] / count
+        if top_ratio >= NEAR_CONSTANT_RATIO:
+            near_constant_columns.append({'column': col, 'dominant_ratio': float(top_ratio)})
+
+        is_numeric = pd.api.types.is_numeric_dtype(series)
+        if not is_numeric:
+            # Values that parse as numbers next to values that do not; only
+            # the distinct values are parsed, weighted by how often they occur
+            parses = pd.to_numeric(pd.Series(value_counts.index, dtype=object), errors='coerce').notna()
+            numeric_values = int(value_counts.to_numpy()[parses.to_numpy()].sum())
+            if 0 < numeric_values < count:
+                mixed_type_columns.append({
+                    'column': col,
+                    'numeric_values': numeric_values,
+                    'text_values': count - numeric_values,
+                })
+
+        if (count >= HIGH_CARDINALITY_MIN_ROWS
+                and unique / count >= HIGH_CARDINALITY_RATIO
+                and (not is_numeric or pd.api.types.is_integer_dtype(series))):
+            high_cardinality_columns.append({'column': col, 'unique': int(unique)})
+
+    total_cells = total_rows * len(df.columns)
+    missing_cells = int(missing.sum())
+    return {
+        'total_rows': total_rows,
+        'total_columns': int(len(df.columns)),
+        'missing_cells': missing_cells,
+        'missing_percentage': (missing_cells / total_cells) * 100 if total_cells > 0 else 0,
+        'missing_by_column': {col: int(missing[col]) for col in df.columns},
+        'duplicate_rows': duplicate_rows,
+        'outliers': outliers,
+        'constant_columns': constant_columns,
+        'near_constant_columns': near_constant_columns,
+        'mixed_type_columns': mixed_type_columns,
+        'high_cardinality_columns': high_cardinality_columns,
+    }
+
+def quality_cache_key(dataset):
+    # updated_at changes whenever the dataset is saved, so it acts as the version
+    return f'dataset-quality:{dataset.id}:{dataset.updated_at.timestamp()}'
+
+def get_dataset_quality(dataset, df=None):
+    key = quality_cache_key(dataset)
+    quality = cache.get(key)
+    if quality is None:
+        if df is None:
+            df = pd.DataFrame(dataset.get_data(), columns=dataset.get_columns())
+        quality = analyze_data_quality(df)
+        cache.set(key, quality, QUALITY_CACHE_TIMEOUT)
+    return quality
@@ -0,0 +1,228 @@
+import pickle
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .lazy import lazy_import
+from .models import Dataset
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+NGRAM_SIZE = 3
+
+
+class ColumnIndex:
+    """Inverted index for one text column.
+
+    ``values`` holds the sorted distinct values; the rows containing
+    ``values[i]`` are ``postings[offsets[i]:offsets[i + 1]]``, stored
+    delta-encoded (first id absolute, then gaps) so the lists compress well
+    on disk. ``ngrams`` maps each lower-cased trigram to the ids of the
+    distinct values containing it, for substring search.
+    """
+
+    def __init__(self, values, offsets, postings, ngrams=None):
+        self.values = values
+        self.offsets = offsets
+        self.postings = postings
+        self.ngrams = ngrams
+        self._lower_values = None
+        self._rows = None
+
+    @classmethod
+    def build(cls, series):
+        present = series.notna().to_numpy()
+        text = series[present].astype(str)
+        if pd.api.types.is_float_dtype(series):
+            # Numbers are indexed as the dashboard shows them: 42.0 as "42"
+            text = text.str.replace(r'\.0$', '', regex=True)
+        codes, uniques = pd.factorize(text, sort=True)
+        row_ids = np.flatnonzero(present)[np.argsort(codes, kind='stable')].astype(np.uint32)
+        counts = np.bincount(codes, minlength=len(uniques))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        postings = np.diff(row_ids, prepend=np.uint32(0)).astype(np.uint32)
+        starts = offsets[:-1][counts > 0]
+        postings[starts] = row_ids[starts]
+
+        values = np.asarray(uniques, dtype=object)
+        ngrams = None
+        if len(values) <= settings.ANALYTICS_INDEX_NGRAM_MAX_VALUES:
+            grams = {}
+            for value_id, value in enumerate(values):
+                lowered = value.lower()
+                for gram in {lowered[i:i + NGRAM_SIZE] for i in range(len(lowered) - NGRAM_SIZE + 1)}:
+                    grams.setdefault(gram, []).append(value_id)
+            ngrams = {gram: np.asarray(ids, dtype=np.uint32) for gram, ids in grams.items()}
+        return cls(values, offsets, postings, ngrams)
+
+    def _decoded(self):
+        # Absolute row ids for every posting, decoded once per process
+        if self._rows is None:
+            totals = np.cumsum(self.postings, dtype=np.uint64)
+            counts = np.diff(self.offsets)
+            starts = self.offsets[:-1]
+            bases = np.where(starts > 0, totals[np.maximum(starts - 1, 0)], 0)
+            self._rows = (totals - np.repeat(bases, counts)).astype(np.uint32)
+        return self._rows
+
+    def rows_for_value_ids(self, value_ids):
+        if len(value_ids) == 0:
+            return np.empty(0, dtype=np.uint32)
+        rows = self._decoded()
+        if len(value_ids) == 1:
+            idx = value_ids[0]
+            return rows[self.offsets[idx]:self.offsets[idx + 1]]
+        # Mark the selected values' posting ranges and take them in one pass
+        selected = np.zeros(len(self.values), dtype=bool)
+        selected[value_ids] = True
+        return np.sort(rows[np.repeat(selected, np.diff(self.offsets))])
+
+    def lookup(self, value):
+        idx = int(np.searchsorted(self.values, value))
+        if idx < len(self.values) and self.values[idx] == value:
+            return self.rows_for_value_ids([idx])
+        return np.empty(0, dtype=np.uint32)
+
+    def contains(self, text):
+        text = text.lower()
+        if self._lower_values is None:
+            self._lower_values = pd.Series(self.values, dtype=object).str.lower()
+        if self.ngrams is not None and len(text) >= NGRAM_SIZE:
+            candidates = None
+            for gram in {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}:
+                ids = self.ngrams.get(gram)
+                if ids is None:
+                    return np.empty(0, dtype=np.uint32)
+                candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+            # Trigram hits are only candidates; confirm the full substring
+            candidate_values = self._lower_values.iloc[candidates]
+            matches = candidates[candidate_values.str.contains(text, regex=False).to_numpy()]
+        else:
+            matches = np.flatnonzero(self._lower_values.str.contains(text, regex=False).to_numpy())
+        return self.rows_for_value_ids(matches)
+
+    def to_state(self):
+        return {
+            'values': self.values,
+            'offsets': self.offsets,
+            'postings': zlib.compress(self.postings.tobytes()),
+            'ngrams': self.ngrams,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        postings = np.frombuffer(zlib.decompress(state['postings']), dtype=np.uint32)
+        return cls(state['values'], state['offsets'], postings, state['ngrams'])
+
+
+def index_version(dataset):
+    return int(dataset.updated_at.timestamp() * 1_000_000)
+
+def index_path(dataset):
+    return Path(settings.ANALYTICS_INDEX_DIR) / f'{dataset.id}-{index_version(dataset)}.pkl'
+
+def build_dataset_index(dataset, df=None):
+    # Every column is indexed; numbers are searched by their text, as shown
+    if df is None:
+        df = pd.DataFrame(dataset.get_data(), columns=dataset.get_columns())
+    index = {col: ColumnIndex.build(df[col]) for col in df.columns}
+    path = index_path(dataset)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A private temporary file per writer, so concurrent builds of the same
+    # version never interleave; the rename publishes it atomically
+    f = tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False)
+    try:
+        with f:
+            pickle.dump({col: column.to_state() for col, column in index.items()}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        Path(f.name).replace(path)
+    except BaseException:
+        Path(f.name).unlink(missing_ok=True)
+        raise
+    return index
+
+def remove_dataset_indexes(dataset_id, before_version=None):
+    """Delete a dataset's index files, or only those older than ``before_version``."""
+    directory = Path(settings.ANALYTICS_INDEX_DIR)
+    if not directory.is_dir():
+        return
+    for path in directory.glob(f'{dataset_id}-*.pkl'):
+        version = path.stem.partition('-')[2]
+        if before_version is None or (version.isdigit() and int(version) < before_version):
+            path.unlink(missing_ok=True)
+
+@receiver(post_save, sender=Dataset)
+def _discard_stale_indexes(sender, instance, **kwargs):
+    # Saving bumps updated_at, so the previous versions' files are stale
+    remove_dataset_indexes(instance.id, before_version=index_version(instance))
+
+@receiver(post_delete, sender=Dataset)
+def _discard_deleted_indexes(sender, instance, **kwargs):
+    remove_dataset_indexes(instance.id)
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def get_dataset_index(dataset):
+    """Load a dataset's index, building it on first use for older datasets."""
+    path = index_path(dataset)
+    with _cache_lock:
+        if path in _cache:
+            _cache.move_to_end(path)
+            return _cache[path]
+
+    if path.exists():
+        with open(path, 'rb') as f:
+            index = {col: ColumnIndex.from_state(state) for col, state in pickle.load(f).items()}
+    else:
+        index = build_dataset_index(dataset)
+
+    with _cache_lock:
+        _cache[path] = index
+        while len(_cache) > settings.ANALYTICS_INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+def _union(arrays):
+    # Posting lists are sorted, so a sort plus neighbour comparison dedups them
+    arrays = [rows for rows in arrays if len(rows)]
+    if not arrays:
+        return np.empty(0, dtype=np.uint32)
+    if len(arrays) == 1:
+        return arrays[0]
+    rows = np.sort(np.concatenate(arrays))
+    if len(rows) == 0:
+        return rows
+    return rows[np.concatenate([[True], rows[1:] != rows[:-1]])]
+
+def _intersect(left, right):
+    return left[np.isin(left, right, assume_unique=True)]
+
+def search_rows(index, filters=None, query=None, search_columns=None):
+    """Return the sorted row ids matching every filter and the text query.
+
+    ``filters`` maps a column to accepted values (OR within a column, AND
+    across columns); ``query`` is a case-insensitive substring matched in any
+    of ``search_columns``.
+    """
+    result = None
+    for col, values in (filters or {}).items():
+        column = index[col]
+        rows = _union([column.lookup(value) for value in values])
+        result = rows if result is None else _intersect(result, rows)
+        if len(result) == 0:
+            return result
+
+    if query:
+        columns = search_columns or list(index)
+        rows = _union([index[col].contains(query) for col in columns])
+        result = rows if result is None else _intersect(result, rows)
+
+    return result
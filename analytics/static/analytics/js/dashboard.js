@@ -1,9 +1,17 @@
+// Files above this size use the resumable chunked upload protocol
+const CHUNKED_UPLOAD_THRESHOLD = 5 * 1024 * 1024;
+const CHUNK_UPLOAD_RETRIES = 5;
+const FINALIZE_RETRIES = 120;
+// Server searches start once typing pauses for this long
+const SEARCH_DEBOUNCE_MS = 250;
+
 new Vue({
     el: '#app',
     delimiters: ['[[', ']]'],
     data: {
         dataset: null,
         statistics: null,
+        quality: null,
         chart: null,
         dataTable: null,
         searchTerm: '',
@@ -16,21 +24,27 @@ new Vue({
             const file = event.target.files[0];
             if (!file) return;
 
-            const formData = new FormData();
-            formData.append('file', file);
-
             try {
-                const response = await fetch('/analytics/upload/', {
-                    method: 'POST',
-                    body: formData
-                });
+                let result;
+                if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+                    result = await this.chunkedUpload(file);
+                } else {
+                    const formData = new FormData();
+                    formData.append('file', file);
 
-                if (!response.ok) throw new Error('Upload failed');
+                    const response = await fetch('/analytics/upload/', {
+                        method: 'POST',
+                        body: formData
+                    });
+
+                    if (!response.ok) throw new Error('Upload failed');
+                    result = await response.json();
+                }
 
-                const result = await response.json();
                 this.dataset = result;
                 await this.loadDataset(result.id);
                 await this.loadStatistics(result.id);
+                await this.loadQuality(result.id);
                 this.initializeCharts();
             } catch (error) {
                 console.error('Error uploading file:', error);
@@ -38,6 +52,72 @@ new Vue({
             }
         },
 
+        async sha256Hex(buffer) {
+            const digest = await crypto.subtle.digest('SHA-256', buffer);
+            return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+        },
+
+        async chunkedUpload(file) {
+            // Resume an interrupted upload of the same file when the server still has it
+            const resumeKey = `chunked-upload:${file.name}:${file.size}:${file.lastModified}`;
+            let session = null;
+            const savedId = localStorage.getItem(resumeKey);
+            if (savedId) {
+                const response = await fetch(`/analytics/upload/chunked/${savedId}/`);
+                if (response.ok) session = await response.json();
+            }
+            if (!session) {
+                const response = await fetch('/analytics/upload/chunked/', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ filename: file.name, total_size: file.size })
+                });
+                if (!response.ok) throw new Error('Failed to start upload');
+                session = await response.json();
+                localStorage.setItem(resumeKey, session.upload_id);
+            }
+
+            const received = new Set(session.received_chunks);
+            for (let index = 0; index < session.total_chunks; index++) {
+                if (received.has(index)) continue;
+
+                const start = index * session.chunk_size;
+                const chunk = await file.slice(start, start + session.chunk_size).arrayBuffer();
+                const checksum = await this.sha256Hex(chunk);
+
+                // Chunk PUTs are idempotent, so failed attempts can simply be retried
+                let response = null;
+                for (let attempt = 1; attempt <= CHUNK_UPLOAD_RETRIES; attempt++) {
+                    try {
+                        response = await fetch(`/analytics/upload/chunked/${session.upload_id}/chunks/${index}/`, {
+                            method: 'PUT',
+                            headers: { 'Content-Type': 'application/octet-stream', 'X-Chunk-Checksum': checksum },
+                            body: chunk
+                        });
+                        if (response.status < 500) break;
+                    } catch (error) {
+                        response = null;
+                    }
+                    await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+                }
+                if (!response || !response.ok) throw new Error(`Failed to upload chunk ${index}`);
+            }
+
+            // 503 means the server is still parsing the last chunks; wait and ask again
+            let response;
+            for (let attempt = 1; ; attempt++) {
+                response = await fetch(`/analytics/upload/chunked/${session.upload_id}/finalize/`, {
+                    method: 'POST'
+                });
+                if (response.status !== 503 || attempt >= FINALIZE_RETRIES) break;
+                const retryAfter = Number(response.headers.get('Retry-After')) || 1;
+                await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+            }
+            if (!response.ok) throw new Error('Upload failed');
+            localStorage.removeItem(resumeKey);
+            return response.json();
+        },
+
         async loadDataset(id) {
             try {
                 const response = await fetch(`/analytics/dataset/${id}/`);
@@ -65,6 +145,17 @@ new Vue({
             }
         },
 
+        async loadQuality(id) {
+            try {
+                const response = await fetch(`/analytics/dataset/${id}/quality/`);
+                if (!response.ok) throw new Error('Failed to load data quality');
+
+                this.quality = await response.json();
+            } catch (error) {
+                console.error('Error loading data quality:', error);
+            }
+        },
+
         updateStatisticsUI() {
             if (!this.statistics) return;
 
@@ -342,13 +433,22 @@ new Vue({
                 };
             } else if (chartType === 'boxplot') {
                 // For box plot, we'll show summary statistics
-                const values = this.dataset.data.map(row => Number(row[yAxis])).filter(val => !isNaN(val)).sort((a, b) => a - b);
-                const q1 = values[Math.floor(values.length * 0.25)];
-                const median = values[Math.floor(values.length * 0.5)];
-                const q3 = values[Math.floor(values.length * 0.75)];
-                const iqr = q3 - q1;
-                const min = Math.max(values[0], q1 - 1.5 * iqr);
-                const max = Math.min(values[values.length - 1], q3 + 1.5 * iqr);
+                let q1, median, q3, min, max;
+                const serverStats = this.quality && this.quality.outliers[yAxis];
+                if (serverStats) {
+                    // Quartiles and whiskers computed server-side by the data-quality engine
+                    ({ q1, median, q3 } = serverStats);
+                    min = serverStats.whisker_low;
+                    max = serverStats.whisker_high;
+                } else {
+                    const values = this.dataset.data.map(row => Number(row[yAxis])).filter(val => !isNaN(val)).sort((a, b) => a - b);
+                    q1 = values[Math.floor(values.length * 0.25)];
+                    median = values[Math.floor(values.length * 0.5)];
+                    q3 = values[Math.floor(values.length * 0.75)];
+                    const iqr = q3 - q1;
+                    min = Math.max(values[0], q1 - 1.5 * iqr);
+                    max = Math.min(values[values.length - 1], q3 + 1.5 * iqr);
+                }
 
                 chartData = {
                     labels: [yAxis],
@@ -537,19 +637,50 @@ new Vue({
             // Add search functionality
             document.getElementById('search-input').addEventListener('input', (e) => {
                 this.searchTerm = e.target.value.toLowerCase();
-                this.updateDataTable();
+                clearTimeout(this.searchTimer);
+                this.searchTimer = setTimeout(() => this.updateDataTable(), SEARCH_DEBOUNCE_MS);
             });
         },
 
-        updateDataTable() {
-            const filteredData = this.dataset.data.filter(row =>
-                Object.values(row).some(val =>
-                    String(val).toLowerCase().includes(this.searchTerm)
-                )
-            );
-
+        async searchRows() {
+            // Text search runs against the server-side inverted index of the dataset
             const startIndex = (this.currentPage - 1) * this.rowsPerPage;
-            const displayedData = filteredData.slice(startIndex, startIndex + this.rowsPerPage);
+            const params = new URLSearchParams({ q: this.searchTerm, offset: startIndex, limit: this.rowsPerPage });
+            // Only the latest search matters; cancel the one still in flight
+            this.cancelSearch();
+            this.searchController = new AbortController();
+            const response = await fetch(`/analytics/dataset/${this.dataset.id}/search/?${params}`, {
+                signal: this.searchController.signal
+            });
+            if (!response.ok) throw new Error('Search failed');
+            const result = await response.json();
+            return result.rows;
+        },
+
+        cancelSearch() {
+            if (this.searchController) {
+                this.searchController.abort();
+                this.searchController = null;
+            }
+        },
+
+        async updateDataTable() {
+            const searchTerm = this.searchTerm;
+            let displayedData;
+            if (searchTerm) {
+                try {
+                    displayedData = await this.searchRows();
+                } catch (error) {
+                    if (error.name !== 'AbortError') console.error('Error searching dataset:', error);
+                    return;
+                }
+                // A newer keystroke has already started another search
+                if (searchTerm !== this.searchTerm) return;
+            } else {
+                this.cancelSearch();
+                const startIndex = (this.currentPage - 1) * this.rowsPerPage;
+                displayedData = this.dataset.data.slice(startIndex, startIndex + this.rowsPerPage);
+            }
 
             const tbody = document.querySelector('#data-table tbody');
             tbody.innerHTML = displayedData.map((row, index) => `
@@ -577,6 +708,7 @@ new Vue({
         resetDataset() {
             this.dataset = null;
             this.statistics = null;
+            this.quality = null;
             if (this.chart) {
                 this.chart.destroy();
                 this.chart = null;
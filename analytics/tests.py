@@ -1,3 +1,782 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+
+from . import uploads
+from .admission import AdmissionController, Overloaded, admission_controlled
+from .joins import JOIN_TYPES, hash_join
+from .lazy import lazy_import
+from .models import Dataset, RequestProfile, UploadSession
+from .profiling import StackSampler, collapse_stacks, top_frames
+from .quality import analyze_data_quality, get_dataset_quality
+from .timeseries import detect_datetime_columns, parse_datetime_column
+from .views import create_dataset
+
+
+class TempDirsMixin:
+    # Chunk files and search indexes go to a per-test temporary directory
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        override = override_settings(
+            CHUNKED_UPLOAD_TEMP_DIR=os.path.join(self.temp_dir, 'chunked_uploads'),
+            ANALYTICS_INDEX_DIR=os.path.join(self.temp_dir, 'search_index'),
+            ANALYTICS_JOIN_SPILL_DIR=os.path.join(self.temp_dir, 'join_spill'),
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class SplitPointTests(TestCase):
+    def test_last_row_boundary(self):
+        self.assertEqual(uploads._split_point(b'a,b\n1,2\n3,4'), 7)
+
+    def test_newline_inside_quotes_is_not_a_boundary(self):
+        block = b'a,b\n1,"x\ny"\n2,"open\nfield'
+        self.assertEqual(uploads._split_point(block), block.index(b'"\n2') + 1)
+
+    def test_escaped_quotes(self):
+        block = b'a\n"say ""hi""\nthere"\n"tail'
+        self.assertEqual(uploads._split_point(block), block.index(b'"\n"tail') + 1)
+
+    def test_no_complete_row(self):
+        self.assertEqual(uploads._split_point(b'"a\nb\nc'), -1)
+        self.assertEqual(uploads._split_point(b'abc'), -1)
+
+
+@override_settings(CHUNKED_UPLOAD_MIN_CHUNK_SIZE=8, CHUNKED_UPLOAD_PARSE_BATCH_SIZE=16)
+class ChunkedUploadTests(TempDirsMixin, TestCase):
+    CSV = (
+        b'id,name,note\n'
+        b'1,alpha,"multi\nline, quoted"\n'
+        b'2,beta,"a ""quoted"" word"\n'
+        b'3,gamma,' + b'x' * 80 + b'\n'
+        b'4,delta,plain\n'
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='secret')
+        self.client.force_login(self.user)
+
+    def init_upload(self, total_size, **extra):
+        return self.client.post(
+            '/analytics/upload/chunked/',
+            data=json.dumps({'filename': 'data.csv', 'total_size': total_size, **extra}),
+            content_type='application/json'
+        )
+
+    def put_chunk(self, upload_id, index, body, checksum=None):
+        return self.client.put(
+            f'/analytics/upload/chunked/{upload_id}/chunks/{index}/',
+            data=body,
+            content_type='application/octet-stream',
+            headers={'X-Chunk-Checksum': checksum or hashlib.sha256(body).hexdigest()}
+        )
+
+    def chunks(self, chunk_size):
+        return [self.CSV[start:start + chunk_size] for start in range(0, len(self.CSV), chunk_size)]
+
+    def test_rejects_invalid_chunk_size(self):
+        for chunk_size in (-5, 0, 1, 7, '64', 64.5, True):
+            with self.subTest(chunk_size=chunk_size):
+                response = self.init_upload(len(self.CSV), chunk_size=chunk_size)
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_out_of_order_chunks(self):
+        session = self.init_upload(len(self.CSV), chunk_size=10).json()
+        chunks = self.chunks(10)
+        self.assertEqual(session['total_chunks'], len(chunks))
+
+        order = list(range(len(chunks)))[::-1]
+        order.insert(0, order.pop())  # chunk 0 first, the rest backwards
+        for index in order:
+            self.assertEqual(self.put_chunk(session['upload_id'], index, chunks[index]).status_code, 200)
+
+        response = self.client.post(f'/analytics/upload/chunked/{session["upload_id"]}/finalize/')
+        self.assertEqual(response.status_code, 200)
+        dataset = Dataset.objects.get(id=response.json()['id'])
+        self.assertEqual(dataset.get_columns(), ['id', 'name', 'note'])
+        self.assertEqual([row['note'] for row in dataset.get_data()], [
+            'multi\nline, quoted', 'a "quoted" word', 'x' * 80, 'plain'
+        ])
+        self.assertFalse(os.path.exists(uploads.session_dir(UploadSession.objects.get())))
+
+    def test_row_longer_than_parse_batch(self):
+        session = UploadSession.objects.create(
+            user=self.user, filename='data.csv', total_size=len(self.CSV),
+            chunk_size=len(self.CSV), total_chunks=1
+        )
+        uploads.prepare_session_storage(session)
+        with open(uploads.session_file(session), 'r+b') as f:
+            f.write(self.CSV)
+        session.received_chunks['0'] = 'checksum'
+
+        uploads.parse_ready_prefix(session)
+        self.assertEqual(session.parsed_bytes, len(self.CSV))
+        self.assertEqual(len(uploads.load_parsed_frame(session)), 4)
+
+    def test_column_types_span_batches(self):
+        # Numeric in the first batches and text later: strings throughout, as
+        # a single read_csv would give, instead of mixed int/str
+        csv = b'code,amount,flag\n' + b''.join(
+            b'%d,%d,True\n' % (i, i) for i in range(20)
+        ) + b'A7,1.5,False\n'
+        session = UploadSession.objects.create(
+            user=self.user, filename='data.csv', total_size=len(csv), chunk_size=len(csv), total_chunks=1
+        )
+        uploads.prepare_session_storage(session)
+        with open(uploads.session_file(session), 'r+b') as f:
+            f.write(csv)
+        session.received_chunks['0'] = 'checksum'
+
+        uploads.parse_ready_prefix(session, final=True)
+        self.assertGreater(session.parsed_batches, 1)
+        df = uploads.load_parsed_frame(session)
+        self.assertEqual(set(map(type, df['code'])), {str})
+        self.assertEqual(df['code'].iloc[0], '0')
+        self.assertEqual(df['amount'].dtype, np.float64)
+        self.assertEqual(df['flag'].dtype, bool)
+
+    def test_finalize_waits_for_claim(self):
+        session = self.init_upload(len(self.CSV), chunk_size=10).json()
+        for index, chunk in enumerate(self.chunks(10)):
+            self.put_chunk(session['upload_id'], index, chunk)
+        stored = UploadSession.objects.get()
+        self.assertIsNone(stored.claimed_until)
+
+        # Another request is still parsing the session
+        self.assertTrue(uploads.try_claim(stored))
+        stored.save()
+        response = self.client.post(f'/analytics/upload/chunked/{session["upload_id"]}/finalize/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+        uploads.release_claim(stored)
+        response = self.client.post(f'/analytics/upload/chunked/{session["upload_id"]}/finalize/')
+        self.assertEqual(response.status_code, 200)
+        stored.refresh_from_db()
+        self.assertEqual(stored.dataset_id, response.json()['id'])
+        self.assertIsNone(stored.claimed_until)
+
+    def test_retry_is_idempotent(self):
+        session = self.init_upload(len(self.CSV), chunk_size=10).json()
+        chunk = self.chunks(10)[0]
+        self.put_chunk(session['upload_id'], 0, chunk)
+        parsed_bytes = UploadSession.objects.get().parsed_bytes
+
+        response = self.put_chunk(session['upload_id'], 0, chunk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['received_chunks'], [0])
+        self.assertEqual(response.json()['parsed_bytes'], parsed_bytes)
+
+        response = self.put_chunk(session['upload_id'], 0, b'0123456789')
+        self.assertEqual(response.status_code, 409)
+
+    def test_rejects_bad_chunks(self):
+        session = self.init_upload(len(self.CSV), chunk_size=10).json()
+        chunk = self.chunks(10)[1]
+        self.assertEqual(self.put_chunk(session['upload_id'], 1, chunk[:5]).status_code, 400)
+        self.assertEqual(self.put_chunk(session['upload_id'], 1, chunk, checksum='0' * 64).status_code, 400)
+        self.assertEqual(self.put_chunk(session['upload_id'], 99, chunk).status_code, 404)
+
+        response = self.client.post(f'/analytics/upload/chunked/{session["upload_id"]}/finalize/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(response.json()['missing_chunks']), session['total_chunks'])
+
+    def test_expire_sessions(self):
+        stale = UploadSession.objects.create(
+            user=self.user, filename='old.csv', total_size=10, chunk_size=10, total_chunks=1
+        )
+        uploads.prepare_session_storage(stale)
+        UploadSession.objects.filter(id=stale.id).update(updated_at=stale.updated_at.replace(year=2000))
+        fresh = self.init_upload(len(self.CSV), chunk_size=10).json()
+
+        orphan = os.path.join(self.temp_dir, 'chunked_uploads', 'orphan')
+        os.makedirs(orphan)
+        os.utime(orphan, (0, 0))
+
+        self.assertEqual(uploads.expire_sessions(), 0)  # already expired by the init above
+        self.assertEqual([str(s.id) for s in UploadSession.objects.all()], [fresh['upload_id']])
+        self.assertFalse(os.path.exists(uploads.session_dir(stale)))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(uploads.session_dir(UploadSession.objects.get())))
+
+
+class TimeSeriesTests(TempDirsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='secret')
+        self.client.force_login(self.user)
+
+    def test_detects_format_once(self):
+        df = pd.DataFrame({
+            'iso': ['2024-01-05T10:00:00', '2024-02-01T11:30:00', None],
+            'us': ['01/05/2024 10:00', '02/01/2024 11:30', '12/31/2024 23:59'],
+            'day_first': ['01/02/2024', '13/02/2024', '25/12/2024'],
+            'numbers': ['1', '2', '3'],
+            'text': ['a', 'b', 'c'],
+        })
+        self.assertEqual(detect_datetime_columns(df), {
+            'iso': 'ISO8601', 'us': '%m/%d/%Y %H:%M', 'day_first': '%d/%m/%Y'
+        })
+        parsed = parse_datetime_column(df['day_first'], '%d/%m/%Y')
+        self.assertEqual(list(parsed.dt.month), [2, 2, 12])
+
+    def test_resample_defaults_to_numeric_columns(self):
+        df = pd.DataFrame({
+            'when': ['03/01/2024 09:00', '03/01/2024 17:00', '03/02/2024 12:00'],
+            'value': [1.0, 3.0, 5.0],
+            'city': ['Oslo', 'Rome', 'Oslo'],
+        })
+        dataset = create_dataset(self.user, 'sales.csv', df)
+        self.assertEqual(dataset.datetime_formats, {'when': '%m/%d/%Y %H:%M'})
+
+        response = self.client.get(f'/analytics/dataset/{dataset.id}/resample/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['periods'], ['2024-03-01', '2024-03-02'])
+        self.assertEqual(response.json()['series'], {'value': [2.0, 5.0]})
+
+        response = self.client.get(f'/analytics/dataset/{dataset.id}/resample/', {'column': ['value', 'city']})
+        self.assertEqual(response.status_code, 400)
+
+
+class LazyImportTests(TestCase):
+    def test_concurrent_first_access(self):
+        # A module that is slow to execute, like pandas on a cold start
+        module_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, module_dir, ignore_errors=True)
+        with open(os.path.join(module_dir, 'slow_analytics_module.py'), 'w') as f:
+            f.write('import time\nfirst = 1\ntime.sleep(0.2)\nlast = 2\n')
+        sys.path.insert(0, module_dir)
+        self.addCleanup(sys.path.remove, module_dir)
+        self.addCleanup(sys.modules.pop, 'slow_analytics_module', None)
+
+        module = lazy_import('slow_analytics_module')
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(module.last)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [2, 2, 2, 2])
+
+
+class AdmissionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('analyst', password='secret')
+        self.client.force_login(self.user)
+        self.dataset = create_dataset(self.user, 'small.csv', pd.DataFrame({'value': [1, 2, 3]}))
+
+    def controller(self, **limits):
+        options = {'memory_budget': 100, 'max_concurrent': 2, 'max_queue': 5, 'timeout': 5, **limits}
+        return AdmissionController(**options)
+
+    def wait_for_queue(self, controller, length):
+        deadline = time.monotonic() + 5
+        while controller.queued < length and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(controller.queued, length)
+
+    def test_newcomers_queue_behind_waiters(self):
+        controller = self.controller()
+        controller.acquire(60)
+        admitted = []
+        large = threading.Thread(target=lambda: (controller.acquire(60), admitted.append('large')))
+        large.start()
+        self.wait_for_queue(controller, 1)
+        # Would fit next to the running request, but someone is already waiting
+        small = threading.Thread(target=lambda: (controller.acquire(10), admitted.append('small')))
+        small.start()
+        self.wait_for_queue(controller, 2)
+        self.assertEqual(admitted, [])
+
+        controller.release(60)
+        large.join(5)
+        small.join(5)
+        self.assertEqual(sorted(admitted), ['large', 'small'])
+        self.assertEqual(controller.snapshot()['admitted_total'], 3)
+
+    def test_wait_times_out(self):
+        controller = self.controller(max_concurrent=1, timeout=0.05)
+        controller.acquire(10)
+        with self.assertRaises(Overloaded):
+            controller.acquire(10)
+        snapshot = controller.snapshot()
+        self.assertEqual((snapshot['timed_out_total'], snapshot['queued'], snapshot['active']), (1, 0, 1))
+
+    def test_full_queue_answers_503(self):
+        controller = self.controller(max_concurrent=1, max_queue=0)
+        controller.acquire(10)
+        with mock.patch('analytics.admission.get_controller', return_value=controller):
+            response = self.client.get(f'/analytics/dataset/{self.dataset.id}/statistics/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '10')
+        self.assertEqual(controller.snapshot()['rejected_total'], 1)
+
+    def test_releases_when_view_raises(self):
+        controller = self.controller()
+
+        @admission_controlled()
+        def failing_view(request, dataset_id):
+            raise RuntimeError('boom')
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with mock.patch('analytics.admission.get_controller', return_value=controller):
+            with self.assertRaises(RuntimeError):
+                failing_view(request, self.dataset.id)
+        snapshot = controller.snapshot()
+        self.assertEqual((snapshot['active'], snapshot['reserved_bytes'], snapshot['admitted_total']), (0, 0, 1))
+
+
+class HashJoinTests(TempDirsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(7)
+        self.left = pd.DataFrame({
+            'key': rng.integers(0, 300, 2000),
+            'code': rng.choice(['a', 'b', 'c', None], 2000),
+            'amount': rng.random(2000),
+        })
+        self.right = pd.DataFrame({
+            'id': rng.integers(100, 400, 800).astype(float),
+            'code': rng.choice(['a', 'b', 'd'], 800),
+            'label': [f'label {i}' for i in range(800)],
+        })
+
+    def sorted_rows(self, df):
+        return df.sort_values(list(df.columns), na_position='first').reset_index(drop=True)
+
+    def batches(self, df, size=300):
+        return lambda: (df.iloc[start:start + size].copy() for start in range(0, len(df), size))
+
+    def test_partitioned_join_matches_in_memory_join(self):
+        build_bytes = int(self.right.memory_usage(deep=True).sum())
+        for how in JOIN_TYPES:
+            for left_on, right_on in ((['key'], ['id']), (['key', 'code'], ['id', 'code'])):
+                with self.subTest(how=how, keys=left_on):
+                    in_memory = hash_join(self.left, self.right, left_on, right_on, how=how)
+                    partitioned = hash_join(
+                        self.batches(self.left), self.batches(self.right), left_on, right_on,
+                        how=how, memory_limit=build_bytes // 4, build_bytes=build_bytes
+                    )
+                    self.assertGreater(len(in_memory), 0)
+                    pd.testing.assert_frame_equal(
+                        self.sorted_rows(partitioned), self.sorted_rows(in_memory), check_dtype=False
+                    )
+        self.assertEqual(os.listdir(os.path.join(self.temp_dir, 'join_spill')), [])
+
+    def test_join_endpoint(self):
+        user = User.objects.create_user('analyst', password='secret')
+        self.client.force_login(user)
+        left = create_dataset(user, 'left.csv', self.left)
+        right = create_dataset(user, 'right.csv', self.right)
+
+        response = self.client.post('/analytics/datasets/join/', data=json.dumps({
+            'left_id': left.id, 'right_id': right.id, 'left_on': 'key', 'right_on': 'id', 'how': 'left'
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        expected = pd.merge(self.left, self.right, how='left', left_on='key', right_on='id')
+        self.assertEqual(response.json()['row_count'], len(expected))
+
+    @override_settings(ANALYTICS_JOIN_MEMORY_LIMIT=65536, ANALYTICS_EXPORT_BATCH_SIZE=100)
+    def test_join_endpoint_streams_partitions(self):
+        user = User.objects.create_user('analyst', password='secret')
+        self.client.force_login(user)
+        # The first batch of the right side has only null keys, so it is read
+        # with a different dtype than the batches after it
+        self.right.loc[:99, 'id'] = np.nan
+        left = create_dataset(user, 'left.csv', self.left)
+        right = create_dataset(user, 'right.csv', self.right)
+
+        response = self.client.post('/analytics/datasets/join/', data=json.dumps({
+            'left_id': left.id, 'right_id': right.id, 'left_on': ['key', 'code'],
+            'right_on': ['id', 'code'], 'how': 'outer'
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        joined = Dataset.objects.get(id=response.json()['id'])
+        expected = pd.merge(
+            self.left, self.right, how='outer', left_on=['key', 'code'], right_on=['id', 'code'],
+            suffixes=('_left', '_right')
+        )
+        actual = pd.DataFrame(joined.get_data(), columns=joined.get_columns())
+        # Stored rows hold None where the merge holds NaN
+        pd.testing.assert_frame_equal(
+            self.sorted_rows(actual).fillna(np.nan), self.sorted_rows(expected).fillna(np.nan),
+            check_dtype=False
+        )
+        self.assertEqual(os.listdir(os.path.join(self.temp_dir, 'join_spill')), [])
+
+
+class BlankCellTests(TempDirsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='secret')
+        self.client.force_login(self.user)
+
+    def test_statistics_and_report_skip_nulls(self):
+        # Blank text cells are stored as null and must not be compared with text
+        upload = SimpleUploadedFile('cities.csv', b'city,val\nOslo,1\n,2\nBergen,3\n', content_type='text/csv')
+        response = self.client.post('/analytics/upload/', {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        dataset_id = response.json()['id']
+
+        response = self.client.get(f'/analytics/dataset/{dataset_id}/statistics/')
+        self.assertEqual(response.status_code, 200)
+        city = response.json()['column_stats']['city']
+        self.assertEqual((city['min'], city['max'], city['missing']), ('Bergen', 'Oslo', 1))
+
+        response = self.client.get(f'/analytics/dataset/{dataset_id}/report/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+@override_settings(ANALYTICS_EXPORT_BATCH_SIZE=2)
+class ExportTests(TempDirsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='secret')
+        self.client.force_login(self.user)
+        self.df = pd.DataFrame({
+            'city': ['Oslo', 'Rome', 'Oslo', None, 'Lima'],
+            'count': pd.Series([1, 2, None, 4, 5], dtype=object),
+            'price': [1.5, 2, 3.25, 4, None],
+            'flag': [True, False, True, None, False],
+            # Numbers in the first batches, text in a later one
+            'code': pd.Series([1, 2, 3, 4, 'abc'], dtype=object),
+        })
+        self.dataset = create_dataset(self.user, 'sales.csv', self.df)
+
+    def export(self, **params):
+        response = self.client.get(f'/analytics/dataset/{self.dataset.id}/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('filename="sales.csv"', response['Content-Disposition'])
+        exported = pd.read_csv(io.BytesIO(body))
+        self.assertEqual(list(exported.columns), list(self.df.columns))
+        self.assertEqual(list(exported['code']), ['1', '2', '3', '4', 'abc'])
+        self.assertEqual(list(exported['city'].fillna('')), ['Oslo', 'Rome', 'Oslo', '', 'Lima'])
+
+    def test_gzip_csv(self):
+        response, body = self.export(gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('filename="sales.csv.gz"', response['Content-Disposition'])
+        self.assertEqual(gzip.decompress(body), self.export()[1])
+
+    def test_parquet_schema_is_fixed_up_front(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        response, body = self.export(format='parquet')
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+        table = pq.read_table(io.BytesIO(body))
+        self.assertEqual(table.schema.types, [pa.string(), pa.int64(), pa.float64(), pa.bool_(), pa.string()])
+        self.assertEqual(table.column('code').to_pylist(), ['1', '2', '3', '4', 'abc'])
+        self.assertEqual(table.column('count').to_pylist(), [1, 2, None, 4, 5])
+        self.assertEqual(table.column('flag').to_pylist(), [True, False, True, None, False])
+
+    def test_select_and_filter(self):
+        import pyarrow.parquet as pq
+
+        _, body = self.export(select=['price', 'city'], filter='city:Oslo')
+        exported = pd.read_csv(io.BytesIO(body))
+        self.assertEqual(list(exported.columns), ['price', 'city'])
+        self.assertEqual(exported.to_dict('records'), [
+            {'price': 1.5, 'city': 'Oslo'}, {'price': 3.25, 'city': 'Oslo'}
+        ])
+
+        _, body = self.export(q='li', format='parquet')
+        self.assertEqual(pq.read_table(io.BytesIO(body)).column('city').to_pylist(), ['Lima'])
+
+        response = self.client.get(f'/analytics/dataset/{self.dataset.id}/export/', {'select': 'missing'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchTests(TempDirsMixin, TestCase):
+    ROWS = 100_000
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('analyst', password='secret')
+        self.client.force_login(self.user)
+        rng = np.random.default_rng(3)
+        self.df = pd.DataFrame({
+            'city': [f'city {i}' for i in rng.integers(0, 50, self.ROWS)],
+            'name': [f'person {i}' for i in range(self.ROWS)],
+            'value': rng.integers(0, 1000, self.ROWS),
+        })
+        self.dataset = create_dataset(self.user, 'people.csv', self.df)
+
+    def search(self, **params):
+        return self.client.get(f'/analytics/dataset/{self.dataset.id}/search/', params).json()
+
+    def test_limit_and_offset(self):
+        matches = np.flatnonzero((self.df['city'] == 'city 7').to_numpy())
+        for offset, limit in ((0, 100), (250, 1000), (len(matches) - 10, 1000), (len(matches) + 5, 100)):
+            with self.subTest(offset=offset, limit=limit):
+                result = self.search(filter='city:city 7', offset=offset, limit=limit)
+                expected = matches[offset:offset + limit]
+                self.assertEqual(result['total'], len(matches))
+                self.assertEqual(result['row_ids'], expected.tolist())
+                self.assertEqual(result['rows'], self.df.iloc[expected].to_dict('records'))
+
+    def test_text_query_near_end_of_dataset(self):
+        result = self.search(q='person 9999', column='name', limit=5, offset=1)
+        self.assertEqual(result['total'], 11)  # person 9999 and person 99990-99999
+        self.assertEqual([row['name'] for row in result['rows']], [f'person {i}' for i in range(99990, 99995)])
+
+    def test_numeric_columns_are_searchable(self):
+        result = self.search(filter='value:123', limit=1000)
+        self.assertEqual(result['row_ids'], np.flatnonzero((self.df['value'] == 123).to_numpy()).tolist())
+
+        dataset = create_dataset(self.user, 'amounts.csv', pd.DataFrame({'amount': [1.0, 2.5, None, 10.0]}))
+        response = self.client.get(f'/analytics/dataset/{dataset.id}/search/', {'q': '1'}).json()
+        self.assertEqual(response['row_ids'], [0, 3])
+        response = self.client.get(f'/analytics/dataset/{dataset.id}/search/', {'filter': 'amount:2.5'}).json()
+        self.assertEqual(response['row_ids'], [1])
+
+    def test_concurrent_builds_and_stale_files(self):
+        from .search_index import build_dataset_index, index_path
+
+        small = create_dataset(self.user, 'small.csv', self.df.head(2000))
+        errors = []
+
+        def build():
+            try:
+                build_dataset_index(small)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=build) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        index_dir = os.path.join(self.temp_dir, 'search_index')
+        self.assertEqual(sorted(os.listdir(index_dir)), sorted(
+            os.path.basename(path) for path in (index_path(self.dataset), index_path(small))
+        ))
+
+        # A new version replaces the old file, and deleting removes it
+        old_path = index_path(small)
+        small.name = 'renamed.csv'
+        small.save()
+        self.assertFalse(old_path.exists())
+        self.client.get(f'/analytics/dataset/{small.id}/search/', {'q': 'city'})
+        self.assertTrue(index_path(small).exists())
+        small.delete()
+        self.assertEqual(os.listdir(index_dir), [os.path.basename(index_path(self.dataset))])
+
+
+def _busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class ProfilingTests(TempDirsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user('staff', password='secret', is_staff=True)
+        self.dataset = create_dataset(self.staff, 'small.csv', pd.DataFrame({'value': [1, 2, 3], 'city': list('abc')}))
+
+    def test_sampler_collects_collapsed_stacks(self):
+        sampler = StackSampler(threading.get_ident(), 0.002)
+        sampler.start()
+        try:
+            _busy_loop(0.2)
+        finally:
+            sampler.stop()
+        self.assertGreater(sum(sampler.stacks.values()), 10)
+        collapsed = collapse_stacks(sampler.stacks)
+        leaf, samples = top_frames(collapsed, limit=1)[0]
+        self.assertTrue(leaf.startswith('_busy_loop (analytics/tests.py:'))
+        self.assertGreater(samples, 0)
+
+    def test_only_staff_requests_are_profiled(self):
+        analyst = User.objects.create_user('analyst', password='secret')
+        dataset = create_dataset(analyst, 'small.csv', pd.DataFrame({'value': [1, 2, 3]}))
+        self.client.force_login(analyst)
+        response = self.client.get(f'/analytics/dataset/{dataset.id}/statistics/', {'profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Analytics-Profile-Id', response)
+
+        self.client.force_login(self.staff)
+        response = self.client.get(f'/analytics/dataset/{self.dataset.id}/statistics/')
+        self.assertNotIn('X-Analytics-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_stores_request_metadata(self):
+        self.client.force_login(self.staff)
+        padding = 'x' * 3000
+        response = self.client.get(
+            f'/analytics/dataset/{self.dataset.id}/statistics/', {'pad': padding},
+            headers={'X-Analytics-Profile': '1'}
+        )
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get(id=response['X-Analytics-Profile-Id'])
+        self.assertEqual(profile.user, self.staff)
+        self.assertEqual(profile.endpoint, 'get_statistics')
+        self.assertEqual(profile.dataset_id, self.dataset.id)
+        self.assertEqual((profile.row_count, profile.column_count, profile.status_code), (3, 2, 200))
+        self.assertEqual(profile.sample_interval_ms, 5)
+        self.assertEqual(len(profile.path), 2048)
+        self.assertTrue(profile.path.startswith(f'/analytics/dataset/{self.dataset.id}/statistics/?pad=x'))
+
+    def test_admin_folded_download(self):
+        profile = RequestProfile.objects.create(
+            user=self.staff, endpoint='generate_report', path='/analytics/', status_code=200,
+            duration_ms=12.5, sample_interval_ms=5, sample_count=3,
+            stacks='main (a.py:1);work (b.py:2) 2\nmain (a.py:1) 1',
+        )
+        admin = User.objects.create_superuser('admin', password='secret')
+        self.client.force_login(admin)
+        response = self.client.get(f'/admin/analytics/requestprofile/{profile.id}/collapsed/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Disposition'], f'attachment; filename="profile-{profile.id}-generate_report.folded"'
+        )
+        self.assertEqual(response.content.decode(), profile.stacks)
+
+        response = self.client.get(f'/admin/analytics/requestprofile/{profile.id}/change/')
+        self.assertContains(response, f'profile-{profile.id}.folded')
+
+        # Staff without the view permission may not read other users' stacks
+        self.client.force_login(self.staff)
+        response = self.client.get(f'/admin/analytics/requestprofile/{profile.id}/collapsed/')
+        self.assertEqual(response.status_code, 403)
+
+
+class PdfLayoutTests(TestCase):
+    def test_chunk_columns_repeats_key_columns(self):
+        from .utils import chunk_columns
+
+        self.assertEqual(chunk_columns([50, 40, 40, 40, 40], 130, key_columns=1), [[0, 1, 2], [0, 3, 4]])
+        self.assertEqual(chunk_columns([40, 40, 40], 100), [[0, 1], [2]])
+        # A column wider than the page still gets a group of its own
+        self.assertEqual(chunk_columns([10, 500, 20], 100, key_columns=1), [[0, 1], [0, 2]])
+        self.assertEqual(chunk_columns([10], 100, key_columns=1), [[0]])
+
+    def test_build_table_chunks(self):
+        from reportlab.platypus import LongTable
+        from .utils import build_table_chunks
+
+        table_data = [['#', 'a', 'b', 'c']] + [[str(i), 'x' * 20, 'y' * 20, 'z' * 20] for i in range(3)]
+        highlight = object()
+        flowables = build_table_chunks(
+            table_data, [], available_width=200, font_size=8, key_columns=1,
+            cell_backgrounds={(3, 2): highlight}
+        )
+        tables = [flowable for flowable in flowables if isinstance(flowable, LongTable)]
+        self.assertGreater(len(tables), 1)
+        for table in tables:
+            self.assertEqual([row[0] for row in table._cellvalues], ['#', '0', '1', '2'])
+            self.assertLessEqual(sum(table._argW), 200)
+        # The background follows its column into whichever group holds it
+        last = tables[-1]
+        self.assertEqual(last._cellvalues[0][-1], 'c')
+        self.assertIn(
+            ('BACKGROUND', (len(last._cellvalues[0]) - 1, 2), (len(last._cellvalues[0]) - 1, 2), highlight),
+            [tuple(command) for command in last._bkgrndcmds]
+        )
+
+    def test_select_heatmap_columns(self):
+        from .utils import select_heatmap_columns
+
+        rng = np.random.default_rng(1)
+        base = rng.random(200)
+        df = pd.DataFrame({
+            'noise1': rng.random(200), 'strong1': base, 'noise2': rng.random(200),
+            'strong2': base * 2 + rng.random(200) * 0.01, 'strong3': -base,
+        })
+        corr = df.corr()
+        self.assertEqual(select_heatmap_columns(corr, max_columns=3), ['strong1', 'strong2', 'strong3'])
+        self.assertEqual(select_heatmap_columns(corr, max_columns=10), list(df.columns))
+
+    def test_scalable_report(self):
+        from .utils import generate_pdf_report
+
+        columns = [f'column_{i}' for i in range(20)]
+        data = [{col: i * j for j, col in enumerate(columns)} for i in range(30)]
+        pdf = generate_pdf_report(data, columns, 'wide.csv', layout='scalable')
+        self.assertTrue(pdf.getvalue().startswith(b'%PDF'))
+
+
+class DataQualityTests(TempDirsMixin, TestCase):
+    def test_duplicates_and_column_checks(self):
+        df = pd.DataFrame({
+            'id': range(40),
+            'constant': ['same'] * 40,
+            'empty': [None] * 40,
+            'mostly': ['a'] * 39 + ['b'],
+            'mixed': ['1', '2.5', 'three', None] * 10,
+            'code': [f'C{i}' for i in range(40)],
+        })
+        df = pd.concat([df, df.iloc[:1]], ignore_index=True)
+        quality = analyze_data_quality(df)
+
+        self.assertEqual(quality['duplicate_rows'], 1)
+        self.assertEqual(quality['constant_columns'], ['constant', 'empty'])
+        self.assertEqual([item['column'] for item in quality['near_constant_columns']], [])
+        self.assertEqual(quality['mixed_type_columns'], [
+            {'column': 'mixed', 'numeric_values': 21, 'text_values': 10}
+        ])
+        self.assertEqual(
+            [item['column'] for item in quality['high_cardinality_columns']], ['id', 'code']
+        )
+        self.assertEqual(quality['missing_by_column']['mixed'], 10)
+
+    def test_near_constant_column(self):
+        df = pd.DataFrame({'flag': ['on'] * 199 + ['off']})
+        self.assertEqual(
+            analyze_data_quality(df)['near_constant_columns'], [{'column': 'flag', 'dominant_ratio': 0.995}]
+        )
+
+    def test_outliers(self):
+        values = list(range(1, 21)) + [100, -80]
+        quality = analyze_data_quality(pd.DataFrame({'value': values, 'flat': [5] * 21 + [6]}))
+        value = quality['outliers']['value']
+        self.assertEqual(value['iqr_outliers'], 2)
+        self.assertEqual(value['robust_z_outliers'], 2)
+        self.assertEqual((value['whisker_low'], value['whisker_high']), (1.0, 20.0))
+        self.assertEqual((value['min'], value['max']), (-80.0, 100.0))
+        # Zero MAD: no robust z-scores rather than a division by zero
+        self.assertEqual(quality['outliers']['flat']['robust_z_outliers'], 0)
+
+    def test_infinite_values_are_json_safe(self):
+        quality = analyze_data_quality(pd.DataFrame({'value': [1.0, 2.0, 3.0, float('inf')]}))
+        self.assertIsNone(quality['outliers']['value']['max'])
+        json.dumps(quality, allow_nan=False)
+
+    def test_cache_follows_updated_at(self):
+        user = User.objects.create_user('analyst', password='secret')
+        dataset = create_dataset(user, 'rows.csv', pd.DataFrame({'value': [1, 1, 2]}))
+        self.assertEqual(get_dataset_quality(dataset)['duplicate_rows'], 1)
+
+        dataset.data = [{'value': 1}, {'value': 2}, {'value': 3}]
+        dataset.save()
+        self.assertEqual(get_dataset_quality(dataset)['duplicate_rows'], 0)
+        # A cached result is served while the version is unchanged
+        self.assertEqual(get_dataset_quality(dataset, df=pd.DataFrame({'value': [7, 7]}))['duplicate_rows'], 0)
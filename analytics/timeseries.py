@@ -0,0 +1,137 @@
+import warnings
+from collections import Counter
+
+from .lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+# Bucket names accepted by the resample endpoint -> pandas offset aliases
+RESAMPLE_FREQUENCIES = {
+    'day': 'D',
+    'week': 'W',
+    'month': 'MS',
+}
+RESAMPLE_AGGREGATIONS = ('mean', 'sum', 'count')
+
+# Share of sampled non-null values that must parse for a column to count as datetime
+DATETIME_DETECTION_RATIO = 0.9
+DATETIME_DETECTION_SAMPLE = 1000
+# Sampled values whose formats are guessed as candidates for the whole column
+DATETIME_FORMAT_GUESSES = 20
+# Upper bound on buckets when the report picks a frequency on its own
+REPORT_MAX_BUCKETS = 60
+
+def _parsed_ratio(parsed, series):
+    return parsed.notna().sum() / max(series.notna().sum(), 1)
+
+def parse_datetime_column(series, datetime_format=None):
+    """Parse ``series`` into naive UTC timestamps; unparseable values become NaT.
+
+    ``datetime_format`` is the format inferred at ingest (see
+    ``infer_datetime_format``) and keeps the parse vectorized. Without one,
+    ISO-8601 is tried first and per-value format inference is the fallback.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.tz_convert(None) if series.dt.tz is not None else series
+    if datetime_format:
+        parsed = pd.to_datetime(series, errors='coerce', format=datetime_format, utc=True)
+    else:
+        parsed = pd.to_datetime(series, errors='coerce', format='ISO8601', utc=True)
+        if _parsed_ratio(parsed, series) < DATETIME_DETECTION_RATIO:
+            parsed = pd.to_datetime(series, errors='coerce', format='mixed', utc=True)
+    return parsed.dt.tz_localize(None)
+
+def infer_datetime_format(sample):
+    """Return one format that parses (almost) all of ``sample``, or ``None``."""
+    from pandas.tseries.api import guess_datetime_format
+
+    sample = sample.astype(str)
+    candidates = ['ISO8601']
+    with warnings.catch_warnings():
+        # Day-first guesses warn; the sample check below decides between them
+        warnings.simplefilter('ignore', UserWarning)
+        guesses = Counter(guess_datetime_format(value) for value in sample.head(DATETIME_FORMAT_GUESSES))
+    candidates += [fmt for fmt, _ in guesses.most_common() if fmt]
+    for fmt in candidates:
+        try:
+            parsed = pd.to_datetime(sample, errors='coerce', format=fmt, utc=True)
+        except (ValueError, TypeError, OverflowError):
+            continue
+        if _parsed_ratio(parsed, sample) >= DATETIME_DETECTION_RATIO:
+            return fmt
+    return None
+
+def detect_datetime_columns(df):
+    """Map the text columns whose values are (almost all) timestamps to their format.
+
+    The format is ``None`` for columns that are already datetime typed, and
+    for mixed-format columns that only parse value by value.
+    """
+    datetime_columns = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            datetime_columns[col] = None
+            continue
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            continue
+        sample = series.dropna().head(DATETIME_DETECTION_SAMPLE)
+        if sample.empty:
+            continue
+        # Numbers stored as text would otherwise be read as day-of-month values
+        if pd.to_numeric(sample, errors='coerce').notna().mean() >= DATETIME_DETECTION_RATIO:
+            continue
+        datetime_format = infer_datetime_format(sample)
+        try:
+            parsed = parse_datetime_column(sample.astype(str), datetime_format)
+        except (ValueError, TypeError, OverflowError):
+            continue
+        if parsed.notna().sum() >= len(sample) * DATETIME_DETECTION_RATIO:
+            datetime_columns[col] = datetime_format
+    return datetime_columns
+
+def resample_time_series(df, time_column, value_columns, freq='day', agg='mean', rolling=None,
+                         datetime_format=None):
+    """Aggregate ``value_columns`` into time buckets of ``time_column``.
+
+    Rows are sorted once on the parsed timestamps and aggregated with pandas'
+    vectorized resampler, so the output size is the number of buckets rather
+    than the number of rows. ``rolling`` applies a trailing window (in
+    buckets) on top of the aggregated series. An already parsed
+    ``time_column`` is used as is.
+    """
+    if freq not in RESAMPLE_FREQUENCIES:
+        raise ValueError(f'Unknown frequency: {freq}')
+    if agg not in RESAMPLE_AGGREGATIONS:
+        raise ValueError(f'Unknown aggregation: {agg}')
+
+    timestamps = parse_datetime_column(df[time_column], datetime_format)
+    values = df[value_columns].apply(pd.to_numeric, errors='coerce')
+    values.index = timestamps
+    values = values[values.index.notna()].sort_index()
+
+    resampled = getattr(values.resample(RESAMPLE_FREQUENCIES[freq]), agg)()
+    if rolling:
+        resampled = resampled.rolling(int(rolling), min_periods=1).mean()
+    return resampled
+
+def auto_frequency(timestamps, max_buckets=REPORT_MAX_BUCKETS):
+    # Finest bucket size that keeps the chart within max_buckets points
+    timestamps = timestamps.dropna()
+    if timestamps.empty:
+        return 'day'
+    span_days = (timestamps.max() - timestamps.min()).days + 1
+    if span_days <= max_buckets:
+        return 'day'
+    if span_days / 7 <= max_buckets:
+        return 'week'
+    return 'month'
+
+def series_to_json(resampled):
+    return {
+        'periods': [period.strftime('%Y-%m-%d') for period in resampled.index],
+        'series': {
+            col: [None if pd.isna(val) else float(val) for val in resampled[col].tolist()]
+            for col in resampled.columns
+        },
+    }
@@ -0,0 +1,231 @@
+import hashlib
+import io
+import math
+import shutil
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from .lazy import lazy_import
+from .models import UploadSession
+
+pd = lazy_import('pandas')
+
+# Bytes copied from the request stream to disk at a time
+STREAM_BLOCK_SIZE = 64 * 1024
+# A parse or finalize claim older than this belongs to a request that died
+CLAIM_TIMEOUT = 60 * 60
+# Spellings read_csv turns into booleans
+TRUE_VALUES = ('True', 'TRUE', 'true')
+FALSE_VALUES = ('False', 'FALSE', 'false')
+
+class ChunkError(Exception):
+    """A chunk was rejected; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def session_dir(session):
+    return Path(settings.CHUNKED_UPLOAD_TEMP_DIR) / str(session.id)
+
+def session_file(session):
+    return session_dir(session) / 'upload.csv'
+
+def batch_file(session, batch_index):
+    return session_dir(session) / f'batch_{batch_index:06d}.pkl'
+
+def plan_chunks(total_size, chunk_size=None):
+    if chunk_size is None:
+        chunk_size = settings.CHUNKED_UPLOAD_CHUNK_SIZE
+    # Only the last chunk may be shorter than the minimum, which also bounds
+    # the number of chunks a session can have
+    if not isinstance(chunk_size, int) or isinstance(chunk_size, bool):
+        raise ChunkError('chunk_size must be an integer')
+    if chunk_size < settings.CHUNKED_UPLOAD_MIN_CHUNK_SIZE:
+        raise ChunkError(f'chunk_size must be at least {settings.CHUNKED_UPLOAD_MIN_CHUNK_SIZE} bytes')
+    chunk_size = min(chunk_size, settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE)
+    if total_size <= 0:
+        raise ChunkError('File is empty')
+    if total_size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        raise ChunkError('File is too large', status=413)
+    return chunk_size, math.ceil(total_size / chunk_size)
+
+def prepare_session_storage(session):
+    # Preallocate the target file so chunks can be written at their offset in any order
+    session_dir(session).mkdir(parents=True, exist_ok=True)
+    with open(session_file(session), 'wb') as f:
+        f.truncate(session.total_size)
+
+def expected_chunk_length(session, index):
+    if index == session.total_chunks - 1:
+        return session.total_size - index * session.chunk_size
+    return session.chunk_size
+
+def write_chunk(session, index, stream, checksum):
+    """Stream one chunk from ``stream`` to its offset in the session file.
+
+    Returns ``False`` when the same chunk was already stored, so retries are
+    idempotent. The body is copied in small blocks and never held in memory.
+    """
+    if not 0 <= index < session.total_chunks:
+        raise ChunkError(f'Chunk index {index} out of range', status=404)
+    checksum = (checksum or '').lower()
+    if not checksum:
+        raise ChunkError('Missing X-Chunk-Checksum header')
+
+    stored = session.received_chunks.get(str(index))
+    if stored is not None:
+        if stored == checksum:
+            return False
+        raise ChunkError(f'Chunk {index} was already stored with a different checksum', status=409)
+
+    expected = expected_chunk_length(session, index)
+    digest = hashlib.sha256()
+    written = 0
+    with open(session_file(session), 'r+b') as f:
+        f.seek(index * session.chunk_size)
+        while written < expected:
+            block = stream.read(min(STREAM_BLOCK_SIZE, expected - written))
+            if not block:
+                break
+            digest.update(block)
+            f.write(block)
+            written += len(block)
+        extra = stream.read(1)
+
+    if written != expected or extra:
+        raise ChunkError(f'Chunk {index} must be exactly {expected} bytes')
+    if digest.hexdigest() != checksum:
+        raise ChunkError(f'Checksum mismatch for chunk {index}')
+    return True
+
+def record_chunk(session, index, checksum):
+    # Called with the session row locked and freshly read, so a concurrent
+    # upload of the same chunk is caught here even if both wrote it to disk
+    stored = session.received_chunks.get(str(index))
+    if stored is not None and stored != checksum:
+        raise ChunkError(f'Chunk {index} was already stored with a different checksum', status=409)
+    session.received_chunks[str(index)] = checksum
+
+def try_claim(session):
+    """Claim the session's files for parsing; call with the row locked.
+
+    The claim is saved with the row and the heavy work runs after the lock
+    is released, so other sessions' chunks are not blocked meanwhile.
+    """
+    now = timezone.now()
+    if session.claimed_until and session.claimed_until > now:
+        return False
+    session.claimed_until = now + timedelta(seconds=CLAIM_TIMEOUT)
+    return True
+
+def release_claim(session, *fields):
+    # Only parse progress (and ``fields``) is written back, so chunks
+    # recorded by other requests during the parse are kept
+    session.claimed_until = None
+    session.save(update_fields=[
+        'parsed_bytes', 'parsed_batches', 'parsed_columns', 'claimed_until', 'updated_at', *fields
+    ])
+
+def _split_point(block):
+    # Last newline that is not inside a quoted field; quote parity is even
+    # at every row boundary because escaped quotes come in pairs
+    pos = block.rfind(b'\n')
+    while pos >= 0 and block.count(b'"', 0, pos) % 2:
+        pos = block.rfind(b'\n', 0, pos)
+    return pos
+
+def _read_block(f, offset, size):
+    f.seek(offset)
+    return f.read(size)
+
+def _parse_batch(session, raw):
+    # Values stay text here; types are decided over the whole file on load,
+    # since a column can look numeric in one batch and not in the next
+    if not raw.strip():
+        return
+    if session.parsed_columns is None:
+        df = pd.read_csv(io.BytesIO(raw), dtype=str)
+        session.parsed_columns = [str(col) for col in df.columns]
+    else:
+        df = pd.read_csv(io.BytesIO(raw), header=None, names=session.parsed_columns, dtype=str)
+    df.to_pickle(batch_file(session, session.parsed_batches))
+    session.parsed_batches += 1
+
+def _infer_column(series):
+    # Numeric or boolean only if every value is, as in a single read_csv
+    try:
+        return pd.to_numeric(series)
+    except (ValueError, TypeError):
+        pass
+    values = series.dropna()
+    if len(values) and values.isin(TRUE_VALUES + FALSE_VALUES).all():
+        booleans = series.map(lambda value: value in TRUE_VALUES if isinstance(value, str) else value)
+        return booleans.astype(bool) if len(values) == len(series) else booleans
+    return series
+
+def parse_ready_prefix(session, final=False):
+    """Parse complete rows from the leading contiguous chunks into batches.
+
+    Rows are parsed as soon as the chunks in front of them have arrived, so
+    most of the file is already parsed when the last chunk lands. Each pass
+    reads about ``CHUNKED_UPLOAD_PARSE_BATCH_SIZE`` bytes.
+    """
+    if final:
+        available = session.total_size
+    else:
+        available = min(session.contiguous_chunks() * session.chunk_size, session.total_size)
+
+    with open(session_file(session), 'rb') as f:
+        while session.parsed_bytes < available:
+            read_size = settings.CHUNKED_UPLOAD_PARSE_BATCH_SIZE
+            while True:
+                remaining = available - session.parsed_bytes
+                block = _read_block(f, session.parsed_bytes, min(read_size, remaining))
+                at_end = len(block) >= remaining
+                end = len(block) if final and at_end else _split_point(block) + 1
+                # A single row longer than the batch: read further before giving up
+                if end > 0 or at_end:
+                    break
+                read_size *= 2
+            if end == 0:
+                break
+            _parse_batch(session, block[:end])
+            session.parsed_bytes += end
+
+def load_parsed_frame(session):
+    batches = [pd.read_pickle(batch_file(session, idx)) for idx in range(session.parsed_batches)]
+    if not batches:
+        raise ValueError('No rows found in uploaded file')
+    df = pd.concat(batches, ignore_index=True)
+    for col in df.columns:
+        df[col] = _infer_column(df[col])
+    return df
+
+def discard_session_storage(session):
+    shutil.rmtree(session_dir(session), ignore_errors=True)
+
+def expire_sessions(max_age=None):
+    """Delete unfinished sessions not updated for ``max_age`` seconds.
+
+    Their preallocated files and parsed batches are removed too, as are
+    leftover directories in ``CHUNKED_UPLOAD_TEMP_DIR`` that no longer belong
+    to a session. Returns the number of sessions deleted.
+    """
+    if max_age is None:
+        max_age = settings.CHUNKED_UPLOAD_EXPIRY
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    expired = list(UploadSession.objects.filter(dataset__isnull=True, updated_at__lt=cutoff))
+    for session in expired:
+        discard_session_storage(session)
+    UploadSession.objects.filter(id__in=[session.id for session in expired]).delete()
+
+    root = Path(settings.CHUNKED_UPLOAD_TEMP_DIR)
+    if root.is_dir():
+        live = {str(session_id) for session_id in UploadSession.objects.values_list('id', flat=True)}
+        for path in root.iterdir():
+            if path.name not in live and path.stat().st_mtime < cutoff.timestamp():
+                shutil.rmtree(path, ignore_errors=True)
+    return len(expired)
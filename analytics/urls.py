@@ -6,7 +6,17 @@ app_name = 'analytics'
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
     path('upload/', views.upload_dataset, name='upload_dataset'),
+    path('upload/chunked/', views.init_chunked_upload, name='init_chunked_upload'),
+    path('upload/chunked/<uuid:upload_id>/', views.chunked_upload_status, name='chunked_upload_status'),
+    path('upload/chunked/<uuid:upload_id>/chunks/<int:index>/', views.upload_chunk, name='upload_chunk'),
+    path('upload/chunked/<uuid:upload_id>/finalize/', views.finalize_chunked_upload, name='finalize_chunked_upload'),
     path('dataset/<int:dataset_id>/', views.get_dataset, name='get_dataset'),
     path('dataset/<int:dataset_id>/report/', views.generate_report, name='generate_report'),
     path('dataset/<int:dataset_id>/statistics/', views.get_statistics, name='get_statistics'),
+    path('dataset/<int:dataset_id>/quality/', views.get_data_quality, name='get_data_quality'),
+    path('dataset/<int:dataset_id>/resample/', views.resample_dataset, name='resample_dataset'),
+    path('dataset/<int:dataset_id>/search/', views.search_dataset, name='search_dataset'),
+    path('dataset/<int:dataset_id>/export/', views.export_dataset, name='export_dataset'),
+    path('datasets/join/', views.join_datasets, name='join_datasets'),
+    path('admission/metrics/', views.admission_metrics, name='admission_metrics'),
 ]
\ No newline at end of file
@@ -6,12 +6,22 @@ from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer, Image, PageBreak
 from reportlab.graphics.shapes import Drawing, Rect
 from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics.charts.piecharts import Pie
 from reportlab.graphics.charts.linecharts import HorizontalLineChart
 from reportlab.graphics.widgets.markers import makeMarker
+from .quality import analyze_data_quality
+from .timeseries import auto_frequency, parse_datetime_column, resample_time_series
+
+# Report layout modes: 'standard' renders every table as a single ReportLab
+# Table, 'scalable' splits wide tables into column groups and long tables into
+# LongTable pages, 'auto' picks 'scalable' once the dataset gets wide.
+PDF_LAYOUT_MODES = ('auto', 'standard', 'scalable')
+SCALABLE_LAYOUT_COLUMN_THRESHOLD = 12
+HEATMAP_MAX_COLUMNS = 15
+TABLE_CELL_MAX_CHARS = 30
 
 def create_bar_chart(data, x_column, y_column, width=500, height=300):
     df = pd.DataFrame(data)
@@ -78,7 +88,20 @@ def create_trend_chart(data, x_column, y_column, width=500, height=300):
     # Sort and aggregate data
     df = df.sort_values(x_column)
     grouped = df.groupby(x_column)[y_column].mean()
-    
+    return create_line_chart(grouped, width, height)
+
+def create_time_series_chart(data, time_column, y_column, freq=None, datetime_format=None, width=500, height=300):
+    # Resample onto time buckets so the chart has O(buckets) points, not O(rows)
+    df = pd.DataFrame(data)
+    # Parsed once here; the resampler reuses the already parsed column
+    df[time_column] = parse_datetime_column(df[time_column], datetime_format)
+    if freq is None:
+        freq = auto_frequency(df[time_column])
+    resampled = resample_time_series(df, time_column, [y_column], freq=freq)[y_column].dropna()
+    resampled.index = resampled.index.strftime('%Y-%m-%d')
+    return create_line_chart(resampled, width, height), freq
+
+def create_line_chart(grouped, width=500, height=300):
     drawing = Drawing(width, height)
     lc = HorizontalLineChart()
     lc.x = 50
@@ -106,11 +129,95 @@ def create_trend_chart(data, x_column, y_column, width=500, height=300):
     drawing.add(lc)
     return drawing
 
-def generate_pdf_report(data, columns, filename):
+def estimate_column_widths(table_data, font_size, max_chars=TABLE_CELL_MAX_CHARS, padding=12):
+    # One pass over the cells, so ReportLab never has to measure them itself
+    widths = []
+    for col_idx in range(len(table_data[0])):
+        longest = max(len(str(row[col_idx])) for row in table_data)
+        widths.append(min(max(longest, 3), max_chars) * font_size * 0.6 + padding)
+    return widths
+
+def chunk_columns(widths, available_width, key_columns=0):
+    # Greedily group column indexes so each group fits the page width,
+    # repeating the leading key columns (row labels) in every group
+    key = list(range(key_columns))
+    key_width = sum(widths[:key_columns])
+    chunks = []
+    current = []
+    current_width = key_width
+    for idx in range(key_columns, len(widths)):
+        if current and current_width + widths[idx] > available_width:
+            chunks.append(key + current)
+            current = []
+            current_width = key_width
+        current.append(idx)
+        current_width += widths[idx]
+    if current or not chunks:
+        chunks.append(key + current)
+    return chunks
+
+def build_table_chunks(table_data, style_commands, available_width, font_size,
+                       key_columns=0, cell_backgrounds=None, row_padding=8):
+    """Lay out a table as LongTables with precomputed sizes.
+
+    Wide tables are split into column groups that fit the page, long tables
+    break across pages with the header row repeated. ``cell_backgrounds`` maps
+    ``(col, row)`` in the full table to a fill colour.
+    """
+    table_data = [[str(cell)[:TABLE_CELL_MAX_CHARS] for cell in row] for row in table_data]
+    widths = estimate_column_widths(table_data, font_size)
+    row_height = font_size * 1.2 + row_padding
+
+    tables = []
+    for chunk in chunk_columns(widths, available_width, key_columns):
+        chunk_data = [[row[idx] for idx in chunk] for row in table_data]
+        commands = list(style_commands)
+        if cell_backgrounds:
+            position = {idx: new_idx for new_idx, idx in enumerate(chunk)}
+            for (col_idx, row_idx), color in cell_backgrounds.items():
+                if col_idx in position:
+                    new_col = position[col_idx]
+                    commands.append(('BACKGROUND', (new_col, row_idx), (new_col, row_idx), color))
+
+        table = LongTable(
+            chunk_data,
+            colWidths=[widths[idx] for idx in chunk],
+            rowHeights=[row_height] * len(chunk_data),
+            repeatRows=1
+        )
+        table.setStyle(TableStyle(commands))
+        tables.append(table)
+        tables.append(Spacer(1, 10))
+    return tables
+
+def select_heatmap_columns(corr_matrix, max_columns=HEATMAP_MAX_COLUMNS):
+    # Keep the columns with the strongest overall correlation to the rest
+    if len(corr_matrix.columns) <= max_columns:
+        return corr_matrix.columns.tolist()
+    strength = corr_matrix.abs().fillna(0).sum(axis=1)
+    top = strength.nlargest(max_columns).index
+    return [col for col in corr_matrix.columns if col in top]
+
+def correlation_color(corr_val):
+    if corr_val > 0.7:
+        return colors.HexColor('#FECACA')  # Light red
+    elif corr_val > 0.3:
+        return colors.HexColor('#FED7AA')  # Light orange
+    elif corr_val > -0.3:
+        return colors.HexColor('#F3F4F6')  # Light gray
+    elif corr_val > -0.7:
+        return colors.HexColor('#BFDBFE')  # Light blue
+    return colors.HexColor('#93C5FD')  # Medium blue
+
+def generate_pdf_report(data, columns, filename, layout='auto', quality=None, datetime_columns=None,
+                        datetime_formats=None, df=None):
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
     elements = []
     styles = getSampleStyleSheet()
+    scalable = layout == 'scalable' or (
+        layout == 'auto' and len(columns) > SCALABLE_LAYOUT_COLUMN_THRESHOLD
+    )
     
     # Title
     title_style = ParagraphStyle(
@@ -163,7 +270,8 @@ def generate_pdf_report(data, columns, filename):
     elements.append(Spacer(1, 10))
     
     # Find numeric and categorical columns
-    df = pd.DataFrame(data)
+    if df is None:
+        df = pd.DataFrame(data)
     numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns
     categorical_cols = df.select_dtypes(include=['object']).columns
     
@@ -196,7 +304,21 @@ def generate_pdf_report(data, columns, filename):
         ))
         elements.append(Spacer(1, 30))
     
-    if len(numeric_cols) > 1:
+    time_cols = [col for col in (datetime_columns or []) if col in df.columns]
+    if len(numeric_cols) > 0 and time_cols:
+        # Trend Chart - Numeric value over time buckets
+        elements.append(Paragraph('Trend Analysis', styles['Heading3']))
+        trend_chart, freq = create_time_series_chart(
+            data, time_cols[0], numeric_cols[0], datetime_format=(datetime_formats or {}).get(time_cols[0])
+        )
+        elements.append(trend_chart)
+        elements.append(Spacer(1, 20))
+
+        elements.append(Paragraph(
+            f'Average {numeric_cols[0]} per {freq} of {time_cols[0]}',
+            styles['Normal']
+        ))
+    elif len(numeric_cols) > 1:
         # Trend Chart - Numeric relationship
         elements.append(Paragraph('Trend Analysis', styles['Heading3']))
         trend_chart = create_trend_chart(data, numeric_cols[0], numeric_cols[1])
@@ -214,7 +336,6 @@ def generate_pdf_report(data, columns, filename):
     elements.append(Paragraph('Detailed Column Statistics', styles['Heading2']))
 
     # Calculate statistics for each column
-    df = pd.DataFrame(data)
     column_data = [['Column', 'Type', 'Mean', 'Median', 'Mode', 'Min', 'Max', 'Missing']]
     for col in columns:
         column_series = df[col]
@@ -241,8 +362,10 @@ def generate_pdf_report(data, columns, filename):
             # Categorical statistics
             mode_vals = column_series.mode()
             mode_val = str(mode_vals.iloc[0]) if not mode_vals.empty else None
-            min_val = str(column_series.min()) if not column_series.empty else None
-            max_val = str(column_series.max()) if not column_series.empty else None
+            # Blank cells are stored as nulls, which do not compare with text
+            present = column_series.dropna().astype(str)
+            min_val = present.min() if not present.empty else None
+            max_val = present.max() if not present.empty else None
             missing = int(column_series.isna().sum())
             unique_count = int(len(column_series.unique()))
 
@@ -251,8 +374,7 @@ def generate_pdf_report(data, columns, filename):
                 '-', '-', mode_val or '-', min_val or '-', max_val or '-', str(missing)
             ])
 
-    col_table = Table(column_data)
-    col_table.setStyle(TableStyle([
+    col_style = [
         ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
         ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
@@ -264,8 +386,13 @@ def generate_pdf_report(data, columns, filename):
         ('FONTSIZE', (0, 1), (-1, -1), 9),
         ('TOPPADDING', (0, 1), (-1, -1), 6),
         ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-    ]))
-    elements.append(col_table)
+    ]
+    if scalable:
+        elements.extend(build_table_chunks(column_data, col_style, doc.width, 10, key_columns=1, row_padding=18))
+    else:
+        col_table = Table(column_data)
+        col_table.setStyle(TableStyle(col_style))
+        elements.append(col_table)
     elements.append(Spacer(1, 20))
 
     # Correlation Heatmap
@@ -279,22 +406,22 @@ def generate_pdf_report(data, columns, filename):
         # Calculate correlation matrix
         corr_matrix = df[numeric_cols].corr()
 
-        # Create heatmap data
-        heatmap_data = []
-        for i, col1 in enumerate(numeric_cols):
-            row = []
-            for j, col2 in enumerate(numeric_cols):
-                corr_val = corr_matrix.loc[col1, col2]
-                row.append(f'{corr_val:.2f}')
-            heatmap_data.append(row)
+        # Cap the rendered heatmap to the most correlated columns on wide datasets
+        heatmap_cols = select_heatmap_columns(corr_matrix) if scalable else numeric_cols
+        heatmap_matrix = corr_matrix.loc[heatmap_cols, heatmap_cols]
 
         # Create table for heatmap
-        heatmap_table_data = [[''] + numeric_cols]
-        for i, col in enumerate(numeric_cols):
-            heatmap_table_data.append([col] + heatmap_data[i])
+        heatmap_table_data = [[''] + heatmap_cols]
+        for col, values in zip(heatmap_cols, heatmap_matrix.values):
+            heatmap_table_data.append([col] + [f'{corr_val:.2f}' for corr_val in values])
 
-        heatmap_table = Table(heatmap_table_data)
-        heatmap_table.setStyle(TableStyle([
+        # Color coding for correlation cells
+        cell_backgrounds = {}
+        for i, values in enumerate(heatmap_matrix.values, start=1):
+            for j, corr_val in enumerate(values, start=1):
+                cell_backgrounds[(j, i)] = correlation_color(round(float(corr_val), 2))
+
+        heatmap_style = [
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -306,25 +433,27 @@ def generate_pdf_report(data, columns, filename):
             ('FONTSIZE', (0, 1), (-1, -1), 7),
             ('TOPPADDING', (0, 1), (-1, -1), 4),
             ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-        ]))
+        ]
 
-        # Add color coding to correlation cells
-        for i in range(1, len(heatmap_table_data)):
-            for j in range(1, len(heatmap_table_data[i])):
-                corr_val = float(heatmap_table_data[i][j])
-                if corr_val > 0.7:
-                    heatmap_table.setStyle(TableStyle([('BACKGROUND', (j, i), (j, i), colors.HexColor('#FECACA'))]))  # Light red
-                elif corr_val > 0.3:
-                    heatmap_table.setStyle(TableStyle([('BACKGROUND', (j, i), (j, i), colors.HexColor('#FED7AA'))]))  # Light orange
-                elif corr_val > -0.3:
-                    heatmap_table.setStyle(TableStyle([('BACKGROUND', (j, i), (j, i), colors.HexColor('#F3F4F6'))]))  # Light gray
-                elif corr_val > -0.7:
-                    heatmap_table.setStyle(TableStyle([('BACKGROUND', (j, i), (j, i), colors.HexColor('#BFDBFE'))]))  # Light blue
-                else:
-                    heatmap_table.setStyle(TableStyle([('BACKGROUND', (j, i), (j, i), colors.HexColor('#93C5FD'))]))  # Medium blue
-
-        elements.append(heatmap_table)
-        elements.append(Spacer(1, 10))
+        if scalable:
+            if len(heatmap_cols) < len(numeric_cols):
+                elements.append(Paragraph(
+                    f'Showing the {len(heatmap_cols)} most correlated of {len(numeric_cols)} numeric columns',
+                    styles['Normal']
+                ))
+                elements.append(Spacer(1, 10))
+            elements.extend(build_table_chunks(
+                heatmap_table_data, heatmap_style, doc.width, 8,
+                key_columns=1, cell_backgrounds=cell_backgrounds, row_padding=12
+            ))
+        else:
+            heatmap_table = Table(heatmap_table_data)
+            heatmap_table.setStyle(TableStyle(heatmap_style + [
+                ('BACKGROUND', (j, i), (j, i), color)
+                for (j, i), color in cell_backgrounds.items()
+            ]))
+            elements.append(heatmap_table)
+            elements.append(Spacer(1, 10))
 
         # Heatmap legend
         legend_data = [
@@ -364,8 +493,10 @@ def generate_pdf_report(data, columns, filename):
     total_rows = len(data)
     total_cols = len(columns)
     total_cells = total_rows * total_cols
-    missing_cells = sum(1 for row in data for col in columns if row[col] is None)
-    missing_percentage = (missing_cells / total_cells) * 100 if total_cells > 0 else 0
+    if quality is None:
+        quality = analyze_data_quality(df)
+    missing_cells = quality['missing_cells']
+    missing_percentage = quality['missing_percentage']
 
     analysis_points.append(f"• Dataset contains {total_rows} rows and {total_cols} columns ({total_cells} total data points)")
     analysis_points.append(f"• Missing data: {missing_cells} cells ({missing_percentage:.1f}%)")
@@ -381,6 +512,28 @@ def generate_pdf_report(data, columns, filename):
     elif missing_percentage > 0:
         analysis_points.append("• Some missing values present - review data completeness")
 
+    if quality['duplicate_rows']:
+        analysis_points.append(f"• Duplicate rows: {quality['duplicate_rows']}")
+    if quality['constant_columns']:
+        analysis_points.append(f"• Constant columns: {', '.join(quality['constant_columns'])}")
+    if quality['near_constant_columns']:
+        near_constant = [item['column'] for item in quality['near_constant_columns']]
+        analysis_points.append(f"• Near-constant columns: {', '.join(near_constant)}")
+    if quality['mixed_type_columns']:
+        mixed = [item['column'] for item in quality['mixed_type_columns']]
+        analysis_points.append(f"• Mixed numeric/text columns: {', '.join(mixed)}")
+    if quality['high_cardinality_columns']:
+        id_like = [item['column'] for item in quality['high_cardinality_columns']]
+        analysis_points.append(f"• Likely ID columns (high cardinality): {', '.join(id_like)}")
+
+    # Outlier insights
+    for col, outlier_stats in quality['outliers'].items():
+        if outlier_stats['iqr_outliers'] or outlier_stats['robust_z_outliers']:
+            analysis_points.append(
+                f"• {col} has {outlier_stats['iqr_outliers']} IQR outliers and "
+                f"{outlier_stats['robust_z_outliers']} robust z-score outliers"
+            )
+
     # Correlation insights
     if len(numeric_cols) >= 2:
         strong_correlations = []
@@ -397,17 +550,19 @@ def generate_pdf_report(data, columns, filename):
             analysis_points.append("• No strong correlations detected between numeric variables")
 
     # Distribution insights
-    for col in columns:
-        if pd.api.types.is_numeric_dtype(df[col]):
-            skewness = df[col].skew()
-            if abs(skewness) > 1:
-                direction = "right-skewed" if skewness > 0 else "left-skewed"
-                analysis_points.append(f"• {col} shows {direction} distribution (skewness: {skewness:.2f})")
+    skew_values = df[numeric_cols].skew() if numeric_cols else {}
+    for col in numeric_cols:
+        skewness = skew_values[col]
+        if abs(skewness) > 1:
+            direction = "right-skewed" if skewness > 0 else "left-skewed"
+            analysis_points.append(f"• {col} shows {direction} distribution (skewness: {skewness:.2f})")
 
     # Recommendations
     analysis_points.append("• Recommendations:")
     if missing_percentage > 5:
         analysis_points.append("  - Consider imputation or removal of missing values")
+    if quality['duplicate_rows']:
+        analysis_points.append("  - Remove duplicate rows before modelling")
     if len(numeric_cols) >= 2:
         analysis_points.append("  - Review correlation matrix for feature relationships")
     if total_rows > 1000:
@@ -428,8 +583,7 @@ def generate_pdf_report(data, columns, filename):
             for col in columns
         ])
     
-    sample_table = Table(sample_data)
-    sample_table.setStyle(TableStyle([
+    sample_style = [
         ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
         ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
@@ -440,8 +594,17 @@ def generate_pdf_report(data, columns, filename):
         ('GRID', (0, 0), (-1, -1), 1, colors.black),
         ('TOPPADDING', (0, 1), (-1, -1), 6),
         ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-    ]))
-    elements.append(sample_table)
+    ]
+    if scalable:
+        # A row number repeated in every column group identifies the row
+        numbered = [['#'] + sample_data[0]] + [
+            [str(row_num)] + row for row_num, row in enumerate(sample_data[1:], start=1)
+        ]
+        elements.extend(build_table_chunks(numbered, sample_style, doc.width, 8, key_columns=1, row_padding=18))
+    else:
+        sample_table = Table(sample_data)
+        sample_table.setStyle(TableStyle(sample_style))
+        elements.append(sample_table)
     
     # Build the PDF
     doc.build(elements)
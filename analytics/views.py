@@ -1,11 +1,30 @@
 from django.shortcuts import render
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
-import pandas as pd
+from django.db import transaction
 import json
-from .models import Dataset
-from .utils import generate_pdf_report
+from .lazy import lazy_import
+from .models import Dataset, UploadSession
+from . import uploads
+from .quality import get_dataset_quality
+from .admission import (
+    admission_controlled, get_controller, estimate_cost, overloaded_response, Overloaded
+)
+from .joins import hash_join, JOIN_TYPES
+from .search_index import build_dataset_index, get_dataset_index, search_rows
+from .profiling import profiled
+from .export import (
+    EXPORT_FORMATS, column_types, fetch_rows, iter_row_batches, parquet_schema,
+    stream_csv, stream_parquet, gzip_stream
+)
+from .timeseries import (
+    detect_datetime_columns, resample_time_series, series_to_json,
+    RESAMPLE_FREQUENCIES, RESAMPLE_AGGREGATIONS
+)
+
+# pandas loads on first use; ReportLab (via .utils) only when a report is built
+pd = lazy_import('pandas')
 
 @login_required
 def dashboard(request):
@@ -23,25 +42,165 @@ def upload_dataset(request):
     
     try:
         df = pd.read_csv(file)
-        data = df.to_dict('records')
-        columns = list(df.columns)
-        
-        dataset = Dataset.objects.create(
-            user=request.user,
-            name=file.name,
-            data=data,
-            columns=columns,
-            row_count=len(data)
-        )
-        
-        return JsonResponse({
-            'id': dataset.id,
-            'name': dataset.name,
-            'columns': columns,
-            'row_count': len(data)
-        })
+        dataset = create_dataset(request.user, file.name, df)
+        return JsonResponse(dataset_summary(dataset))
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+def create_dataset(user, name, df):
+    # Missing values (e.g. unmatched rows of an outer join) are stored as null, not NaN
+    data = df.astype(object).where(df.notna(), None).to_dict('records')
+    datetime_columns = detect_datetime_columns(df)
+    dataset = Dataset.objects.create(
+        user=user,
+        name=name,
+        data=data,
+        columns=list(df.columns),
+        row_count=len(data),
+        datetime_columns=list(datetime_columns),
+        datetime_formats={col: fmt for col, fmt in datetime_columns.items() if fmt}
+    )
+    build_dataset_index(dataset, df)
+    return dataset
+
+def iter_dataset_frames(dataset):
+    # Rows as DataFrame batches streamed from the database, without caching
+    # them on a (deferred) Dataset instance; an empty dataset yields one empty frame
+    columns = dataset.get_columns()
+    empty = True
+    for batch in iter_row_batches(dataset):
+        empty = False
+        yield pd.DataFrame(batch, columns=columns)
+    if empty:
+        yield pd.DataFrame(columns=columns)
+
+def dataset_summary(dataset):
+    return {
+        'id': dataset.id,
+        'name': dataset.name,
+        'columns': dataset.get_columns(),
+        'row_count': dataset.row_count,
+        'datetime_columns': dataset.datetime_columns
+    }
+
+def upload_session_status(session):
+    return {
+        'upload_id': str(session.id),
+        'filename': session.filename,
+        'total_size': session.total_size,
+        'chunk_size': session.chunk_size,
+        'total_chunks': session.total_chunks,
+        'received_chunks': sorted(int(idx) for idx in session.received_chunks),
+        'parsed_bytes': session.parsed_bytes,
+        'dataset_id': session.dataset_id
+    }
+
+@csrf_exempt
+@login_required
+def init_chunked_upload(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+        filename = str(payload['filename'])[:255]
+        total_size = int(payload['total_size'])
+        chunk_size, total_chunks = uploads.plan_chunks(total_size, payload.get('chunk_size'))
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'filename and total_size are required'}, status=400)
+    except uploads.ChunkError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+    # Sessions abandoned by their clients are cleaned up as new ones start
+    uploads.expire_sessions()
+    session = UploadSession.objects.create(
+        user=request.user,
+        filename=filename,
+        total_size=total_size,
+        chunk_size=chunk_size,
+        total_chunks=total_chunks
+    )
+    uploads.prepare_session_storage(session)
+    return JsonResponse(upload_session_status(session), status=201)
+
+@csrf_exempt
+@login_required
+def upload_chunk(request, upload_id, index):
+    if request.method != 'PUT':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        session = UploadSession.objects.get(id=upload_id, user=request.user)
+        if session.dataset_id:
+            return JsonResponse({'error': 'Upload already finalized'}, status=409)
+        checksum = request.headers.get('X-Chunk-Checksum', '').lower()
+        # The body is streamed to disk outside the lock so chunks upload in
+        # parallel; only the bookkeeping below is serialized
+        if uploads.write_chunk(session, index, request, checksum):
+            with transaction.atomic():
+                session = UploadSession.objects.select_for_update().get(id=upload_id)
+                uploads.record_chunk(session, index, checksum)
+                claimed = uploads.try_claim(session)
+                session.save(update_fields=['received_chunks', 'claimed_until', 'updated_at'])
+            # Parsing runs after the lock is released; whoever holds the claim
+            # parses, and anything left over is picked up by the next chunk
+            if claimed:
+                try:
+                    uploads.parse_ready_prefix(session)
+                except Exception:
+                    # Leave the remaining bytes to be parsed (and reported) on finalize
+                    pass
+                uploads.release_claim(session)
+        return JsonResponse(upload_session_status(session))
+    except UploadSession.DoesNotExist:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+    except uploads.ChunkError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+@login_required
+def chunked_upload_status(request, upload_id):
+    try:
+        session = UploadSession.objects.get(id=upload_id, user=request.user)
+        return JsonResponse(upload_session_status(session))
+    except UploadSession.DoesNotExist:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+
+@csrf_exempt
+@login_required
+def finalize_chunked_upload(request, upload_id):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(id=upload_id, user=request.user)
+            if session.dataset_id:
+                # Finalize is idempotent as well
+                return JsonResponse(dataset_summary(session.dataset))
+            missing = session.missing_chunks()
+            if missing:
+                return JsonResponse({'error': 'Upload incomplete', 'missing_chunks': missing}, status=409)
+            if not uploads.try_claim(session):
+                # Another request is parsing the last chunks; ask the client to retry
+                response = JsonResponse({'error': 'Upload is still being processed'}, status=503)
+                response['Retry-After'] = '1'
+                return response
+            session.save(update_fields=['claimed_until', 'updated_at'])
+    except UploadSession.DoesNotExist:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+
+    # The claim keeps other requests off the session's files, so parsing and
+    # building the dataset do not hold the database lock
+    try:
+        uploads.parse_ready_prefix(session, final=True)
+        df = uploads.load_parsed_frame(session)
+        session.dataset = create_dataset(request.user, session.filename, df)
     except Exception as e:
+        uploads.release_claim(session)
         return JsonResponse({'error': str(e)}, status=400)
+    uploads.release_claim(session, 'dataset')
+    uploads.discard_session_storage(session)
+    return JsonResponse(dataset_summary(session.dataset))
 
 @login_required
 def get_dataset(request, dataset_id):
@@ -52,16 +211,32 @@ def get_dataset(request, dataset_id):
             'name': dataset.name,
             'data': dataset.get_data(),
             'columns': dataset.get_columns(),
-            'row_count': dataset.row_count
+            'row_count': dataset.row_count,
+            'datetime_columns': dataset.datetime_columns
         })
     except Dataset.DoesNotExist:
         return JsonResponse({'error': 'Dataset not found'}, status=404)
 
 @login_required
+@admission_controlled(cost_factor=3)
+@profiled
 def generate_report(request, dataset_id):
+    from .utils import generate_pdf_report, PDF_LAYOUT_MODES
+
     try:
         dataset = Dataset.objects.get(id=dataset_id, user=request.user)
-        pdf_file = generate_pdf_report(dataset.get_data(), dataset.get_columns(), dataset.name)
+        layout = request.GET.get('layout', 'auto')
+        if layout not in PDF_LAYOUT_MODES:
+            return JsonResponse({'error': f'Unknown layout: {layout}'}, status=400)
+        data = dataset.get_data()
+        # One frame serves both the report and a quality cache miss
+        df = pd.DataFrame(data, columns=dataset.get_columns())
+        quality = get_dataset_quality(dataset, df)
+        pdf_file = generate_pdf_report(
+            data, dataset.get_columns(), dataset.name,
+            layout=layout, quality=quality, datetime_columns=dataset.datetime_columns,
+            datetime_formats=dataset.datetime_formats, df=df
+        )
         
         response = HttpResponse(content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="{dataset.name}_report.pdf"'
@@ -71,6 +246,8 @@ def generate_report(request, dataset_id):
         return JsonResponse({'error': 'Dataset not found'}, status=404)
 
 @login_required
+@admission_controlled()
+@profiled
 def get_statistics(request, dataset_id):
     try:
         dataset = Dataset.objects.get(id=dataset_id, user=request.user)
@@ -101,6 +278,8 @@ def get_statistics(request, dataset_id):
                 mode_values = column_data.mode()
                 mode = str(mode_values.iloc[0]) if not mode_values.empty else None
                 mode_count = len(mode_values) if len(mode_values) > 1 else None
+                # Blank cells are stored as nulls, which do not compare with text
+                present = column_data.dropna().astype(str)
 
                 stats[column] = {
                     'type': 'categorical',
@@ -108,8 +287,8 @@ def get_statistics(request, dataset_id):
                     'most_common': str(value_counts.index[0]) if not value_counts.empty else None,
                     'mode': mode,
                     'mode_count': mode_count,
-                    'min': str(column_data.min()) if not column_data.empty else None,
-                    'max': str(column_data.max()) if not column_data.empty else None,
+                    'min': present.min() if not present.empty else None,
+                    'max': present.max() if not present.empty else None,
                     'missing': int(column_data.isna().sum())
                 }
 
@@ -123,3 +302,229 @@ def get_statistics(request, dataset_id):
         })
     except Dataset.DoesNotExist:
         return JsonResponse({'error': 'Dataset not found'}, status=404)
+
+@login_required
+@admission_controlled()
+@profiled
+def get_data_quality(request, dataset_id):
+    try:
+        dataset = Dataset.objects.get(id=dataset_id, user=request.user)
+        return JsonResponse(get_dataset_quality(dataset))
+    except Dataset.DoesNotExist:
+        return JsonResponse({'error': 'Dataset not found'}, status=404)
+
+@login_required
+@admission_controlled()
+@profiled
+def resample_dataset(request, dataset_id):
+    try:
+        dataset = Dataset.objects.get(id=dataset_id, user=request.user)
+    except Dataset.DoesNotExist:
+        return JsonResponse({'error': 'Dataset not found'}, status=404)
+
+    columns = dataset.get_columns()
+    time_column = request.GET.get('time_column') or next(iter(dataset.datetime_columns), None)
+    if time_column not in columns:
+        return JsonResponse({'error': 'A valid time_column is required'}, status=400)
+    value_columns = request.GET.getlist('column')
+    unknown = [col for col in value_columns if col not in columns]
+    if unknown:
+        return JsonResponse({'error': f'Unknown columns: {", ".join(unknown)}'}, status=400)
+
+    freq = request.GET.get('freq', 'day')
+    agg = request.GET.get('agg', 'mean')
+    if freq not in RESAMPLE_FREQUENCIES or agg not in RESAMPLE_AGGREGATIONS:
+        return JsonResponse({'error': 'Unsupported freq or agg'}, status=400)
+    try:
+        rolling = int(request.GET['rolling']) if request.GET.get('rolling') else None
+    except ValueError:
+        return JsonResponse({'error': 'rolling must be an integer'}, status=400)
+    if rolling is not None and rolling < 1:
+        return JsonResponse({'error': 'rolling must be positive'}, status=400)
+
+    df = pd.DataFrame(dataset.get_data(), columns=columns)
+    # Only numeric columns can be aggregated; text columns would come back all null
+    numeric_columns = [
+        col for col in columns if col != time_column and pd.api.types.is_numeric_dtype(df[col])
+    ]
+    if value_columns:
+        non_numeric = [col for col in value_columns if col not in numeric_columns]
+        if non_numeric:
+            return JsonResponse({'error': f'Columns are not numeric: {", ".join(non_numeric)}'}, status=400)
+    else:
+        value_columns = numeric_columns
+    resampled = resample_time_series(
+        df, time_column, value_columns, freq=freq, agg=agg, rolling=rolling,
+        datetime_format=dataset.datetime_formats.get(time_column)
+    )
+    return JsonResponse({
+        'time_column': time_column,
+        'freq': freq,
+        'agg': agg,
+        'rolling': rolling,
+        **series_to_json(resampled)
+    })
+
+@login_required
+def admission_metrics(request):
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    return JsonResponse(get_controller().snapshot())
+
+@csrf_exempt
+@login_required
+def join_datasets(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+        # Rows are loaded by the join itself, after the request is admitted
+        left = Dataset.objects.defer('data').get(id=payload['left_id'], user=request.user)
+        right = Dataset.objects.defer('data').get(id=payload['right_id'], user=request.user)
+        left_on = payload.get('left_on') or payload['on']
+        right_on = payload.get('right_on') or payload['on']
+        how = payload.get('how', 'inner')
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'left_id, right_id and key columns are required'}, status=400)
+    except Dataset.DoesNotExist:
+        return JsonResponse({'error': 'Dataset not found'}, status=404)
+
+    if isinstance(left_on, str):
+        left_on = [left_on]
+    if isinstance(right_on, str):
+        right_on = [right_on]
+    if how not in JOIN_TYPES:
+        return JsonResponse({'error': f'Unknown join type: {how}'}, status=400)
+    if len(left_on) != len(right_on):
+        return JsonResponse({'error': 'left_on and right_on must have the same length'}, status=400)
+    missing = [key for key in left_on if key not in left.get_columns()]
+    missing += [key for key in right_on if key not in right.get_columns()]
+    if missing:
+        return JsonResponse({'error': f'Unknown key columns: {", ".join(missing)}'}, status=400)
+
+    cost = (estimate_cost(left.row_count, len(left.get_columns()), 2)
+            + estimate_cost(right.row_count, len(right.get_columns()), 2))
+    controller = get_controller()
+    try:
+        controller.acquire(cost)
+    except Overloaded as e:
+        return overloaded_response(e)
+    try:
+        # The build side's size is estimated from its shape, so neither side
+        # is loaded just to decide whether the join spills
+        joined = hash_join(
+            lambda: iter_dataset_frames(left), lambda: iter_dataset_frames(right),
+            left_on, right_on, how=how,
+            build_bytes=estimate_cost(right.row_count, len(right.get_columns()))
+        )
+        name = payload.get('name') or f'{left.name} {how} join {right.name}'
+        dataset = create_dataset(request.user, name[:255], joined)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    finally:
+        controller.release(cost)
+    return JsonResponse(dataset_summary(dataset), status=201)
+
+def parse_search_filters(request, index):
+    # filter=<column>:<value>, repeatable; values for the same column are OR-ed
+    filters = {}
+    for item in request.GET.getlist('filter'):
+        column, sep, value = item.partition(':')
+        if not sep:
+            raise ValueError(f'Invalid filter: {item}')
+        filters.setdefault(column, []).append(value)
+    search_columns = request.GET.getlist('column') or None
+    unindexed = [col for col in list(filters) + (search_columns or []) if col not in index]
+    if unindexed:
+        raise ValueError(f'Columns are not indexed: {", ".join(unindexed)}')
+    return filters, search_columns
+
+@login_required
+def search_dataset(request, dataset_id):
+    try:
+        # The rows themselves are not needed unless the index has to be built
+        dataset = Dataset.objects.defer('data').get(id=dataset_id, user=request.user)
+    except Dataset.DoesNotExist:
+        return JsonResponse({'error': 'Dataset not found'}, status=404)
+
+    index = get_dataset_index(dataset)
+    try:
+        filters, search_columns = parse_search_filters(request, index)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    try:
+        limit = min(int(request.GET.get('limit', 100)), 1000)
+        offset = max(int(request.GET.get('offset', 0)), 0)
+    except ValueError:
+        return JsonResponse({'error': 'limit and offset must be integers'}, status=400)
+
+    query = request.GET.get('q', '')
+    if not filters and not query:
+        return JsonResponse({'error': 'Provide q or at least one filter'}, status=400)
+
+    rows = search_rows(index, filters=filters, query=query, search_columns=search_columns)
+    page = [int(row_id) for row_id in rows[offset:offset + limit]]
+
+    # Fetch only the page's rows from the stored JSON, not the whole dataset
+    return JsonResponse({
+        'total': int(len(rows)),
+        'offset': offset,
+        'limit': limit,
+        'row_ids': page,
+        'rows': fetch_rows(dataset, page),
+        'indexed_columns': list(index)
+    })
+
+@login_required
+def export_dataset(request, dataset_id):
+    try:
+        dataset = Dataset.objects.defer('data').get(id=dataset_id, user=request.user)
+    except Dataset.DoesNotExist:
+        return JsonResponse({'error': 'Dataset not found'}, status=404)
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f'Unknown format: {export_format}'}, status=400)
+    compress = request.GET.get('gzip') in ('1', 'true')
+
+    columns = dataset.get_columns()
+    selected = request.GET.getlist('select') or columns
+    unknown = [col for col in selected if col not in columns]
+    if unknown:
+        return JsonResponse({'error': f'Unknown columns: {", ".join(unknown)}'}, status=400)
+
+    # Optional subset, using the same filters as the search endpoint
+    row_ids = None
+    if request.GET.getlist('filter') or request.GET.get('q'):
+        index = get_dataset_index(dataset)
+        try:
+            filters, search_columns = parse_search_filters(request, index)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        row_ids = search_rows(index, filters=filters, query=request.GET.get('q', ''), search_columns=search_columns)
+
+    batches = iter_row_batches(dataset, row_ids=row_ids)
+    base_name = dataset.name.rsplit('.', 1)[0]
+    if export_format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return JsonResponse({'error': 'Parquet export requires pyarrow'}, status=501)
+        schema = parquet_schema(selected, column_types(dataset))
+        content = stream_parquet(batches, schema, compression='gzip' if compress else 'snappy')
+        content_type = 'application/vnd.apache.parquet'
+        filename = f'{base_name}.parquet'
+    else:
+        content = stream_csv(batches, selected)
+        content_type = 'text/csv'
+        filename = f'{base_name}.csv'
+        if compress:
+            content = gzip_stream(content)
+            content_type = 'application/gzip'
+            filename += '.gz'
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,23 @@
+import importlib
+import time
+
+# Modules that analytics views load lazily on first use
+HEAVY_MODULES = (
+    'numpy',
+    'pandas',
+    'analytics.utils',
+)
+
+def preload():
+    """Import the heavy analytics dependencies up front.
+
+    Call this in the master of a forking server (gunicorn ``preload_app``) so
+    every worker inherits already-imported pandas and ReportLab modules.
+    Returns the seconds spent importing each module.
+    """
+    timings = {}
+    for name in HEAVY_MODULES:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - start
+    return timings
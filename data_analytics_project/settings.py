@@ -78,6 +78,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # SQLite ignores select_for_update(); taking the write lock when a
+        # transaction starts serializes read-modify-write blocks (e.g. chunk
+        # bookkeeping of parallel chunk uploads) instead of failing them
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -122,9 +129,52 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
-# Maximum upload size for files
-DATA_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50MB
-FILE_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50MB
+# Maximum in-memory size for request bodies; larger file uploads spill to
+# temporary files instead of staying in worker RAM
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
+
+# Chunked uploads: chunks are streamed to a preallocated file on disk and
+# complete leading rows are parsed while later chunks are still arriving
+CHUNKED_UPLOAD_TEMP_DIR = BASE_DIR / 'tmp' / 'chunked_uploads'
+CHUNKED_UPLOAD_CHUNK_SIZE = 5242880  # 5MB
+CHUNKED_UPLOAD_MIN_CHUNK_SIZE = 262144  # 256KB
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 16777216  # 16MB
+CHUNKED_UPLOAD_MAX_SIZE = 2147483648  # 2GB
+CHUNKED_UPLOAD_PARSE_BATCH_SIZE = 8388608  # 8MB
+# Unfinished sessions untouched for this long are deleted with their files
+CHUNKED_UPLOAD_EXPIRY = 86400  # 24 hours
+
+# Admission control for heavy analytics requests (reports, statistics, ...).
+# Each request's memory cost is estimated as rows * columns * bytes-per-cell;
+# work beyond the per-process budget waits in a bounded queue, and requests
+# that cannot be queued get a 503 with Retry-After.
+ANALYTICS_ADMISSION_MEMORY_BUDGET = 1073741824  # 1GB per process
+ANALYTICS_ADMISSION_MAX_CONCURRENT = 2
+ANALYTICS_ADMISSION_MAX_QUEUE = 8
+ANALYTICS_ADMISSION_QUEUE_TIMEOUT = 30  # seconds
+ANALYTICS_ADMISSION_BYTES_PER_CELL = 200
+ANALYTICS_ADMISSION_RETRY_AFTER = 10  # seconds
+
+# Dataset joins: above this build-side size both inputs are hash-partitioned
+# to disk and joined one partition at a time
+ANALYTICS_JOIN_MEMORY_LIMIT = 268435456  # 256MB
+ANALYTICS_JOIN_SPILL_DIR = BASE_DIR / 'tmp' / 'join_spill'
+
+# Inverted value indexes for text columns, built at ingest and used by the
+# search endpoint. Columns with more distinct values than
+# ANALYTICS_INDEX_NGRAM_MAX_VALUES skip the trigram index and fall back to
+# scanning their distinct values for substring search.
+ANALYTICS_INDEX_DIR = BASE_DIR / 'tmp' / 'search_index'
+ANALYTICS_INDEX_NGRAM_MAX_VALUES = 200000
+ANALYTICS_INDEX_CACHE_SIZE = 8
+
+# Rows encoded per batch by the streaming export endpoint
+ANALYTICS_EXPORT_BATCH_SIZE = 10000
+
+# Stack sampling interval for staff-requested profiles (?profile=1 or the
+# X-Analytics-Profile: 1 header) of report/statistics endpoints
+ANALYTICS_PROFILE_INTERVAL = 0.005  # seconds
 
 # Authentication settings
 LOGIN_URL = '/accounts/login/'
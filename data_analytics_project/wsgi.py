@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'data_analytics_project.settings')
 
 application = get_wsgi_application()
+
+# Servers that fork workers can import pandas/ReportLab once in the master
+# (see gunicorn.conf.py) instead of on each worker's first analytics request.
+if os.environ.get('ANALYTICS_PRELOAD') == '1':
+    from analytics.warmup import preload
+
+    preload()
@@ -0,0 +1,7 @@
+# Gunicorn settings, picked up automatically from the working directory.
+import os
+
+# Load the Django app in the master and preload the heavy analytics modules
+# there, so forked workers start with pandas and ReportLab already imported.
+preload_app = True
+os.environ.setdefault('ANALYTICS_PRELOAD', '1')
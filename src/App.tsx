@@ -13,14 +13,16 @@ function App() {
   const [columns, setColumns] = useState<string[]>([]);
   const [selectedColumns, setSelectedColumns] = useState<string[]>([]);
   const [fileName, setFileName] = useState<string>('');
+  const [datasetId, setDatasetId] = useState<number | undefined>(undefined);
   const chartRef = useRef<HTMLDivElement>(null);
 
-  const handleDataLoaded = (loadedData: Record<string, any>[], name: string) => {
+  const handleDataLoaded = (loadedData: Record<string, any>[], name: string, id?: number) => {
     const cols = Object.keys(loadedData[0] || {});
     setData(loadedData);
     setColumns(cols);
     setSelectedColumns(cols);
     setFileName(name);
+    setDatasetId(id);
   };
 
   const handleDownloadReport = async () => {
@@ -135,7 +137,13 @@ function App() {
               <Charts data={data} columns={selectedColumns} />
             </div>
 
-            <DataTable data={data} columns={columns} selectedColumns={selectedColumns} onColumnsChange={setSelectedColumns} />
+            <DataTable
+              data={data}
+              columns={columns}
+              selectedColumns={selectedColumns}
+              onColumnsChange={setSelectedColumns}
+              datasetId={datasetId}
+            />
 
             <div className="flex justify-center">
               <button
@@ -143,6 +151,7 @@ function App() {
                   setData([]);
                   setColumns([]);
                   setFileName('');
+                  setDatasetId(undefined);
                 }}
                 className="px-6 py-3 bg-gray-600 text-white font-semibold rounded-lg hover:bg-gray-700 transition-all shadow-md"
               >
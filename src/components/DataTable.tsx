@@ -1,27 +1,63 @@
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { ChevronLeft, ChevronRight, Search } from 'lucide-react';
+import { searchDataset, SearchResult } from '../lib/datasetApi';
+
+// Server searches start once typing pauses for this long
+const SEARCH_DEBOUNCE_MS = 250;
 
 interface DataTableProps {
   data: Record<string, any>[];
   columns: string[];
   selectedColumns: string[];
   onColumnsChange: (columns: string[]) => void;
+  // Set for datasets stored on the server; search then uses its inverted index
+  datasetId?: number;
 }
 
-export default function DataTable({ data, columns, selectedColumns, onColumnsChange }: DataTableProps) {
+export default function DataTable({ data, columns, selectedColumns, onColumnsChange, datasetId }: DataTableProps) {
   const [currentPage, setCurrentPage] = useState(1);
   const [searchTerm, setSearchTerm] = useState('');
+  const [serverResult, setServerResult] = useState<SearchResult | null>(null);
   const rowsPerPage = 10;
+  const startIndex = (currentPage - 1) * rowsPerPage;
+  const useServerSearch = datasetId !== undefined && searchTerm !== '';
 
-  const filteredData = data.filter(row =>
-    Object.values(row).some(val =>
-      String(val).toLowerCase().includes(searchTerm.toLowerCase())
-    )
-  );
+  useEffect(() => {
+    if (!useServerSearch || datasetId === undefined) {
+      setServerResult(null);
+      return;
+    }
+    // A newer search term or page cancels both the pending and the in-flight request
+    const controller = new AbortController();
+    const timer = setTimeout(() => {
+      searchDataset(datasetId, searchTerm, startIndex, rowsPerPage, controller.signal)
+        .then(setServerResult)
+        .catch(error => {
+          if (error.name !== 'AbortError') console.error('Error searching dataset:', error);
+        });
+    }, SEARCH_DEBOUNCE_MS);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [useServerSearch, datasetId, searchTerm, startIndex]);
 
-  const totalPages = Math.ceil(filteredData.length / rowsPerPage);
-  const startIndex = (currentPage - 1) * rowsPerPage;
-  const displayedData = filteredData.slice(startIndex, startIndex + rowsPerPage);
+  let totalRows: number;
+  let displayedData: Record<string, any>[];
+  if (useServerSearch) {
+    totalRows = serverResult?.total ?? 0;
+    displayedData = serverResult?.rows ?? [];
+  } else {
+    const filteredData = data.filter(row =>
+      Object.values(row).some(val =>
+        String(val).toLowerCase().includes(searchTerm.toLowerCase())
+      )
+    );
+    totalRows = filteredData.length;
+    displayedData = filteredData.slice(startIndex, startIndex + rowsPerPage);
+  }
+
+  const totalPages = Math.ceil(totalRows / rowsPerPage);
 
   const toggleColumn = (column: string) => {
     if (selectedColumns.includes(column)) {
@@ -109,7 +145,7 @@ export default function DataTable({ data, columns, selectedColumns, onColumnsCha
 
       <div className="flex items-center justify-between mt-6">
         <p className="text-sm text-gray-600">
-          Showing {startIndex + 1} to {Math.min(startIndex + rowsPerPage, filteredData.length)} of {filteredData.length} rows
+          Showing {startIndex + 1} to {Math.min(startIndex + rowsPerPage, totalRows)} of {totalRows} rows
         </p>
 
         <div className="flex items-center space-x-2">
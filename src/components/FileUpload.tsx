@@ -1,20 +1,40 @@
 import { useState, useCallback } from 'react';
 import { Upload, FileSpreadsheet, X } from 'lucide-react';
 import Papa from 'papaparse';
+import { CHUNKED_UPLOAD_THRESHOLD, chunkedUpload } from '../lib/chunkedUpload';
+import { apiConfigured, fetchDatasetRows } from '../lib/datasetApi';
 
 interface FileUploadProps {
-  onDataLoaded: (data: Record<string, any>[], fileName: string) => void;
+  onDataLoaded: (data: Record<string, any>[], fileName: string, datasetId?: number) => void;
 }
 
 export default function FileUpload({ onDataLoaded }: FileUploadProps) {
   const [isDragging, setIsDragging] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
   const [fileName, setFileName] = useState<string | null>(null);
+  const [uploadProgress, setUploadProgress] = useState<number | null>(null);
 
   const processFile = useCallback((file: File) => {
     setIsLoading(true);
     setFileName(file.name);
 
+    if (apiConfigured && file.size > CHUNKED_UPLOAD_THRESHOLD) {
+      // Large files go to the server in resumable chunks and are parsed there
+      setUploadProgress(0);
+      chunkedUpload(file, setUploadProgress)
+        .then(async dataset => onDataLoaded(await fetchDatasetRows(dataset.id), file.name, dataset.id))
+        .catch(error => {
+          console.error('Error uploading file:', error);
+          alert('Error uploading file. Please try again.');
+          setFileName(null);
+        })
+        .finally(() => {
+          setIsLoading(false);
+          setUploadProgress(null);
+        });
+      return;
+    }
+
     Papa.parse(file, {
       header: true,
       dynamicTyping: true,
@@ -84,14 +104,20 @@ export default function FileUpload({ onDataLoaded }: FileUploadProps) {
             </div>
             <div>
               <h3 className="text-2xl font-bold text-gray-800 mb-2">
-                {isLoading ? 'Processing...' : 'Upload Your Dataset'}
+                {isLoading
+                  ? uploadProgress !== null
+                    ? `Uploading... ${Math.round(uploadProgress * 100)}%`
+                    : 'Processing...'
+                  : 'Upload Your Dataset'}
               </h3>
               <p className="text-gray-600 mb-2">
                 Drag and drop your CSV file here, or click to browse
               </p>
-              <p className="text-sm text-gray-500">
-                Supports CSV files up to 50MB
-              </p>
+              {apiConfigured && (
+                <p className="text-sm text-gray-500">
+                  Large CSV files are uploaded in resumable chunks
+                </p>
+              )}
             </div>
           </div>
         </div>
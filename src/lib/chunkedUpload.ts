@@ -0,0 +1,103 @@
+// Client for the Django resumable chunked upload protocol:
+// init -> PUT each chunk with its SHA-256 checksum -> finalize.
+
+import { apiBaseUrl } from './datasetApi';
+
+// Files above this size are uploaded to the server in chunks instead of parsed in the browser
+export const CHUNKED_UPLOAD_THRESHOLD = 5 * 1024 * 1024;
+const CHUNK_UPLOAD_RETRIES = 5;
+const FINALIZE_RETRIES = 120;
+
+interface UploadSession {
+  upload_id: string;
+  chunk_size: number;
+  total_chunks: number;
+  received_chunks: number[];
+}
+
+export interface UploadedDataset {
+  id: number;
+  name: string;
+  columns: string[];
+  row_count: number;
+}
+
+async function sha256Hex(buffer: ArrayBuffer): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', buffer);
+  return Array.from(new Uint8Array(digest))
+    .map(b => b.toString(16).padStart(2, '0'))
+    .join('');
+}
+
+async function startSession(file: File, resumeKey: string): Promise<UploadSession> {
+  // Resume an interrupted upload of the same file when the server still has it
+  const savedId = localStorage.getItem(resumeKey);
+  if (savedId) {
+    const response = await fetch(`${apiBaseUrl}/analytics/upload/chunked/${savedId}/`, { credentials: 'include' });
+    if (response.ok) return response.json();
+  }
+
+  const response = await fetch(`${apiBaseUrl}/analytics/upload/chunked/`, {
+    method: 'POST',
+    credentials: 'include',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ filename: file.name, total_size: file.size }),
+  });
+  if (!response.ok) throw new Error('Failed to start upload');
+  const session: UploadSession = await response.json();
+  localStorage.setItem(resumeKey, session.upload_id);
+  return session;
+}
+
+async function putChunk(uploadId: string, index: number, chunk: ArrayBuffer, checksum: string) {
+  // Chunk PUTs are idempotent, so failed attempts can simply be retried
+  let response: Response | null = null;
+  for (let attempt = 1; attempt <= CHUNK_UPLOAD_RETRIES; attempt++) {
+    try {
+      response = await fetch(`${apiBaseUrl}/analytics/upload/chunked/${uploadId}/chunks/${index}/`, {
+        method: 'PUT',
+        credentials: 'include',
+        headers: { 'Content-Type': 'application/octet-stream', 'X-Chunk-Checksum': checksum },
+        body: chunk,
+      });
+      if (response.status < 500) break;
+    } catch {
+      response = null;
+    }
+    await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+  }
+  if (!response || !response.ok) throw new Error(`Failed to upload chunk ${index}`);
+}
+
+export async function chunkedUpload(
+  file: File,
+  onProgress?: (fraction: number) => void
+): Promise<UploadedDataset> {
+  const resumeKey = `chunked-upload:${file.name}:${file.size}:${file.lastModified}`;
+  const session = await startSession(file, resumeKey);
+
+  const received = new Set(session.received_chunks);
+  for (let index = 0; index < session.total_chunks; index++) {
+    if (!received.has(index)) {
+      const start = index * session.chunk_size;
+      const chunk = await file.slice(start, start + session.chunk_size).arrayBuffer();
+      await putChunk(session.upload_id, index, chunk, await sha256Hex(chunk));
+    }
+    onProgress?.((index + 1) / session.total_chunks);
+  }
+
+  // 503 means the server is still parsing the last chunks; wait and ask again
+  let response: Response;
+  for (let attempt = 1; ; attempt++) {
+    response = await fetch(`${apiBaseUrl}/analytics/upload/chunked/${session.upload_id}/finalize/`, {
+      method: 'POST',
+      credentials: 'include',
+    });
+    if (response.status !== 503 || attempt >= FINALIZE_RETRIES) break;
+    const retryAfter = Number(response.headers.get('Retry-After')) || 1;
+    await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+  }
+  if (!response.ok) throw new Error('Upload failed');
+  localStorage.removeItem(resumeKey);
+  return response.json();
+}
@@ -0,0 +1,38 @@
+// Client for the Django analytics API of datasets stored on the server.
+
+export const apiBaseUrl = import.meta.env.VITE_API_BASE_URL ?? '';
+
+// The Django API is only used when the app is pointed at a backend, either
+// directly or through the Vite dev proxy; otherwise files are parsed locally
+export const apiConfigured = Boolean(
+  import.meta.env.VITE_API_BASE_URL || import.meta.env.VITE_API_PROXY_TARGET
+);
+
+export interface SearchResult {
+  total: number;
+  rows: Record<string, any>[];
+}
+
+// Text search backed by the server-side inverted index of a stored dataset
+export async function searchDataset(
+  id: number,
+  query: string,
+  offset: number,
+  limit: number,
+  signal?: AbortSignal
+): Promise<SearchResult> {
+  const params = new URLSearchParams({ q: query, offset: String(offset), limit: String(limit) });
+  const response = await fetch(`${apiBaseUrl}/analytics/dataset/${id}/search/?${params}`, {
+    credentials: 'include',
+    signal,
+  });
+  if (!response.ok) throw new Error('Search failed');
+  return response.json();
+}
+
+export async function fetchDatasetRows(id: number): Promise<Record<string, any>[]> {
+  const response = await fetch(`${apiBaseUrl}/analytics/dataset/${id}/`, { credentials: 'include' });
+  if (!response.ok) throw new Error('Failed to load dataset');
+  const result = await response.json();
+  return result.data;
+}
@@ -1 +1,9 @@
 /// <reference types="vite/client" />
+
+interface ImportMetaEnv {
+  // Origin of the Django backend when it is served separately. It must allow
+  // this app's origin with credentials (CORS) and share its session cookie.
+  readonly VITE_API_BASE_URL?: string;
+  // Django backend proxied by the Vite dev server; see vite.config.ts
+  readonly VITE_API_PROXY_TARGET?: string;
+}
@@ -1,10 +1,25 @@
-import { defineConfig } from 'vite';
+import { defineConfig, loadEnv } from 'vite';
 import react from '@vitejs/plugin-react';
 
 // https://vitejs.dev/config/
-export default defineConfig({
-  plugins: [react()],
-  optimizeDeps: {
-    exclude: ['lucide-react'],
-  },
+export default defineConfig(({ mode }) => {
+  const env = loadEnv(mode, process.cwd());
+
+  return {
+    plugins: [react()],
+    optimizeDeps: {
+      exclude: ['lucide-react'],
+    },
+    // With VITE_API_PROXY_TARGET (e.g. http://localhost:8000) the dev server
+    // forwards the Django analytics API and login pages, so the session cookie
+    // is same-origin. Log in once at /accounts/login/ on the dev server.
+    server: env.VITE_API_PROXY_TARGET
+      ? {
+          proxy: {
+            '/analytics': env.VITE_API_PROXY_TARGET,
+            '/accounts': env.VITE_API_PROXY_TARGET,
+          },
+        }
+      : undefined,
+  };
 });